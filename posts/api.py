@@ -0,0 +1,124 @@
+"""JSON API лент только для чтения: ``/api/posts/``,
+``/api/group/<slug>/posts/`` и ``/api/<username>/posts/``.
+
+Страницы берутся из того же кэша, что и HTML-ленты. ``ETag`` строится
+из версии ленты и номера страницы, ``Last-Modified`` - из времени
+последнего изменения ленты, поэтому повторный опрос без изменений
+получает ``304 Not Modified`` без выборки постов и сериализации.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models import Max
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path
+from django.utils.http import urlencode
+from django.views.decorators.http import condition, require_safe
+
+from . import caching, feeds
+from .models import Group, Post
+
+
+def _position(request):
+    if settings.FEED_PAGINATION == 'cursor':
+        return 'cursor', request.GET.get('cursor', '')
+    return 'page', request.GET.get('page', '')
+
+
+def _feed_name(kind, key):
+    """Имя ленты в ``caching`` по аргументам URL; ``None``, если группы
+    или автора нет (тогда 404 вернёт сама view)."""
+    if kind == 'index':
+        return 'index'
+    if kind == 'group':
+        group_id = Group.objects.filter(slug=key).values_list(
+            'id', flat=True).first()
+        return group_id and f'group:{group_id}'
+    user_id = User.objects.filter(username=key).values_list(
+        'id', flat=True).first()
+    return user_id and f'author:{user_id}'
+
+
+def _etag(request, kind, key=None):
+    name = _feed_name(kind, key)
+    if name is None or not caching.settled(name):
+        return None
+    raw = '%s:%s:%s:%s' % (name, caching.version(name), *_position(request))
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def _last_modified(request, kind, key=None):
+    name = _feed_name(kind, key)
+    if name is None or not caching.settled(name):
+        return None
+    modified = caching.modified(name)
+    if modified is not None:
+        return modified
+    # Время изменения вытеснено из кэша: берём последний пост ленты
+    posts = Post.objects.all()
+    if kind == 'group':
+        posts = posts.filter(group__slug=key)
+    elif kind == 'author':
+        posts = posts.filter(author__username=key)
+    return posts.aggregate(latest=Max('pub_date'))['latest']
+
+
+def post_to_dict(post):
+    image = None
+    if post.image:
+        image = post.thumbnail_urls.get('card') or post.image.url
+    return {
+        'id': post.id,
+        'text': post.text,
+        'pub_date': post.pub_date.isoformat(),
+        'author': post.author.username,
+        'group': post.group.slug if post.group_id else None,
+        'image': image,
+        'comment_count': post.comment_count,
+    }
+
+
+def _page_link(request, page, forward):
+    if getattr(page, 'is_cursor', False):
+        cursor = page.next_cursor if forward else page.previous_cursor
+        return cursor and request.path + '?' + urlencode({'cursor': cursor})
+    if forward and page.has_next():
+        number = page.next_page_number()
+    elif not forward and page.has_previous():
+        number = page.previous_page_number()
+    else:
+        return None
+    return request.path + '?' + urlencode({'page': number})
+
+
+def _feed_response(request, name, queryset):
+    page = caching.cached_page(request, name, queryset)
+    return JsonResponse(
+        {'results': [post_to_dict(post) for post in page.object_list],
+         'next': _page_link(request, page, forward=True),
+         'previous': _page_link(request, page, forward=False)},
+        json_dumps_params={'ensure_ascii': False})
+
+
+@require_safe
+@condition(etag_func=_etag, last_modified_func=_last_modified)
+def feed(request, kind, key=None):
+    if kind == 'group':
+        group = get_object_or_404(Group, slug=key)
+        return _feed_response(request, f'group:{group.id}',
+                              feeds.group_feed(group))
+    if kind == 'author':
+        author = get_object_or_404(User, username=key)
+        return _feed_response(request, f'author:{author.id}',
+                              feeds.author_feed(author))
+    return _feed_response(request, 'index', feeds.index_feed())
+
+
+urlpatterns = [
+    path('posts/', feed, {'kind': 'index'}, name='api_index'),
+    path('group/<slug:key>/posts/', feed, {'kind': 'group'},
+         name='api_group'),
+    path('<str:key>/posts/', feed, {'kind': 'author'}, name='api_profile'),
+]
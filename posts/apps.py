@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class PostsConfig(AppConfig):
     name = 'posts'
+
+    def ready(self):
+        # Модули с задачами регистрируют их в posts.tasks при импорте
+        from . import images, notifications, signals, thumbnails  # noqa: F401
@@ -0,0 +1,206 @@
+"""Кэш страниц лент с версионными ключами.
+
+Ключ страницы включает номер версии ленты; любая запись, меняющая
+ленту, увеличивает версию, и старые страницы просто перестают
+читаться. Поэтому время жизни записей может быть большим.
+
+Попадания и промахи считаются в памяти процесса и сбрасываются в кэш
+не чаще раза в ``settings.FEED_STATS_FLUSH_SECONDS``: чтение ленты из
+кэша не превращается в запись. Несброшенные счётчики теряются при
+остановке процесса.
+"""
+import datetime
+import hashlib
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+from django.db import transaction
+
+from yatube import db_router
+
+from .models import Post
+from .paginator import CursorPage, CursorPaginator, paginate
+
+FEEDS = ('index', 'group', 'author')
+
+
+def _version_key(name):
+    return f'feed:version:{name}'
+
+
+def _modified_key(name):
+    return f'feed:modified:{name}'
+
+
+def version(name):
+    key = _version_key(name)
+    value = cache.get(key)
+    if value is None:
+        # Версия могла быть вытеснена из кэша: начинаем с метки времени,
+        # чтобы не вернуться к номеру, под которым лежат старые страницы
+        now = time.time()
+        cache.add(key, int(now * 1000), None)
+        # Под новой версией ещё ничего не закэшировано, поэтому считать
+        # ленту изменённой сейчас безопасно
+        cache.add(_modified_key(name), now, None)
+        value = cache.get(key)
+    return value
+
+
+def _incr(name):
+    try:
+        cache.incr(_version_key(name))
+    except ValueError:
+        version(name)
+    cache.set(_modified_key(name), time.time(), None)
+
+
+def modified(name):
+    """Время последнего изменения ленты ``name`` или ``None``, если
+    оно неизвестно (например, вытеснено из кэша)."""
+    timestamp = cache.get(_modified_key(name))
+    if timestamp is None:
+        return None
+    return datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc)
+
+
+def bump(name):
+    """Сбрасывает закэшированные страницы ленты ``name``.
+
+    Версия увеличивается сразу и ещё раз после коммита: иначе читатель,
+    попавший между ними, закэширует под новой версией старые данные.
+    """
+    _incr(name)
+    transaction.on_commit(lambda: _incr(name))
+
+
+def settled(name):
+    """Видны ли при чтении все изменения ленты ``name``.
+
+    Реплика может отставать от основной базы: пока после сброса ленты
+    не прошло ``READ_YOUR_WRITES_SECONDS``, собранную с неё страницу
+    нельзя надолго класть в кэш или отдавать с ETag.
+    """
+    if not db_router.reads_from_replica():
+        return True
+    changed = cache.get(_modified_key(name))
+    return (changed is not None and time.time() - changed
+            >= settings.READ_YOUR_WRITES_SECONDS)
+
+
+def _dump(page):
+    if isinstance(page, CursorPage):
+        return ('cursor', list(page.object_list),
+                page.has_next(), page.has_previous())
+    return ('offset', list(page.object_list),
+            page.number, page.paginator.count)
+
+
+def _load(data, queryset):
+    mode, object_list, *state = data
+    if mode == 'cursor':
+        paginator = CursorPaginator(queryset, settings.PAR_PAGE)
+        return CursorPage(object_list, paginator, *state)
+    number, count = state
+    paginator = Paginator(queryset, settings.PAR_PAGE)
+    paginator.count = count
+    return Page(object_list, number, paginator)
+
+
+def _stats_key(feed, outcome):
+    return f'feed:stats:{feed}:{outcome}'
+
+
+_pending = Counter()
+_pending_lock = threading.Lock()
+_flushed_at = time.monotonic()
+
+
+def flush_stats():
+    """Переносит счётчики этого процесса в кэш."""
+    global _flushed_at
+    with _pending_lock:
+        counts = dict(_pending)
+        _pending.clear()
+        _flushed_at = time.monotonic()
+    for (feed, outcome), delta in counts.items():
+        key = _stats_key(feed, outcome)
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            if not cache.add(key, delta, None):
+                cache.incr(key, delta)
+
+
+def _count(feed, outcome):
+    with _pending_lock:
+        _pending[feed, outcome] += 1
+        due = (time.monotonic() - _flushed_at
+               >= settings.FEED_STATS_FLUSH_SECONDS)
+    if due:
+        flush_stats()
+
+
+def stats():
+    """Попадания и промахи кэша по видам лент."""
+    flush_stats()
+    return {feed: (cache.get(_stats_key(feed, 'hits'), 0),
+                   cache.get(_stats_key(feed, 'misses'), 0))
+            for feed in FEEDS}
+
+
+def reset_stats():
+    with _pending_lock:
+        _pending.clear()
+    cache.delete_many([_stats_key(feed, outcome) for feed in FEEDS
+                       for outcome in ('hits', 'misses')])
+
+
+def cached_page(request, name, queryset):
+    """Страница ленты ``name`` из кэша; при промахе строится через
+    ``paginate`` и сохраняется.
+
+    ``name`` - ``'index'``, ``'group:<id>'`` или ``'author:<id>'``.
+    """
+    mode = settings.FEED_PAGINATION
+    position = request.GET.get('cursor' if mode == 'cursor' else 'page', '')
+    digest = hashlib.md5(position.encode()).hexdigest()
+    key = f'feed:page:{name}:{version(name)}:{mode}:{digest}'
+    feed = name.split(':')[0]
+    data = cache.get(key)
+    if data is not None:
+        _count(feed, 'hits')
+        return _load(data, queryset)
+    _count(feed, 'misses')
+    page = paginate(request, queryset)
+    timeout = settings.FEED_CACHE_TIMEOUT
+    if not settled(name):
+        timeout = settings.READ_YOUR_WRITES_SECONDS
+    cache.set(key, _dump(page), timeout)
+    return page
+
+
+def bump_post_id(post_id):
+    """``bump_post`` по id, без загрузки поста целиком."""
+    row = Post.objects.filter(pk=post_id).values_list(
+        'author_id', 'group_id').first()
+    if row is None:
+        return
+    author_id, group_id = row
+    bump('index')
+    bump(f'author:{author_id}')
+    if group_id is not None:
+        bump(f'group:{group_id}')
+
+
+def bump_post(post, *group_ids):
+    """Сбрасывает ленты, в которых виден ``post``: общую, автора и
+    группы (включая ``group_ids``, из которых пост был перенесён)."""
+    bump('index')
+    bump(f'author:{post.author_id}')
+    for group_id in {post.group_id, *group_ids} - {None}:
+        bump(f'group:{group_id}')
@@ -0,0 +1,138 @@
+"""ETag и Last-Modified для HTML-страниц лент и постов.
+
+Функции передаются в ``django.views.decorators.http.condition``: если
+страница не менялась с прошлого запроса клиента, view не вызывается и
+шаблон не рендерится - клиент получает ``304 Not Modified``.
+
+Разметка зависит от зрителя (меню, форма комментария, кнопка
+подписки), поэтому в ETag входят id пользователя и состояние подписки.
+Изменения постов и комментариев видны по версиям лент из ``caching``,
+подписки - по счётчикам автора. Пока реплика может не успеть получить
+последние изменения ленты, ETag и Last-Modified не отдаются.
+"""
+import hashlib
+
+from django.contrib.auth.models import User
+from django.db.models import Max
+
+from . import caching
+from .models import Comment, Follow, Group, Post, UserCounter
+
+
+def _viewer(request):
+    return request.user.pk if request.user.is_authenticated else 0
+
+
+def _tag(request, *parts):
+    raw = ':'.join(map(str, (_viewer(request), request.GET.urlencode(),
+                             *parts)))
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def _latest(*times):
+    return max((value for value in times if value is not None),
+               default=None)
+
+
+def _author_state(request, author_id):
+    """Счётчики автора и подписан ли на него зритель."""
+    author_counters = UserCounter.objects.filter(
+        user_id=author_id).values_list(
+        'posts_count', 'followers_count', 'following_count').first()
+    following = request.user.is_authenticated and Follow.objects.filter(
+        user=request.user, author_id=author_id).exists()
+    return author_counters, following
+
+
+def _feed_last_modified(name, posts):
+    """Последнее изменение ленты: время сброса её кэша, а если оно
+    неизвестно - последний пост или комментарий."""
+    modified = caching.modified(name)
+    if modified is not None:
+        return modified
+    return _latest(
+        posts.aggregate(latest=Max('pub_date'))['latest'],
+        Comment.objects.filter(post__in=posts).aggregate(
+            latest=Max('created'))['latest'])
+
+
+def _memoize(request, key, lookup):
+    """ETag и Last-Modified считаются для одного запроса подряд: id
+    группы или автора ищется один раз."""
+    cache = request.__dict__.setdefault('_conditional', {})
+    if key not in cache:
+        cache[key] = lookup()
+    return cache[key]
+
+
+def _group_id(request, slug):
+    return _memoize(request, ('group', slug), lambda: Group.objects.filter(
+        slug=slug).values_list('id', flat=True).first())
+
+
+def _author_id(request, username):
+    return _memoize(request, ('author', username), lambda: User.objects.filter(
+        username=username).values_list('id', flat=True).first())
+
+
+def group_etag(request, slug):
+    group_id = _group_id(request, slug)
+    if group_id is None or not caching.settled(f'group:{group_id}'):
+        return None
+    return _tag(request, caching.version(f'group:{group_id}'))
+
+
+def group_last_modified(request, slug):
+    group_id = _group_id(request, slug)
+    if group_id is None or not caching.settled(f'group:{group_id}'):
+        return None
+    return _feed_last_modified(f'group:{group_id}',
+                               Post.objects.filter(group_id=group_id))
+
+
+def profile_etag(request, username):
+    author_id = _author_id(request, username)
+    if author_id is None or not caching.settled(f'author:{author_id}'):
+        return None
+    return _tag(request, caching.version(f'author:{author_id}'),
+                *_author_state(request, author_id))
+
+
+def profile_last_modified(request, username):
+    author_id = _author_id(request, username)
+    if author_id is None or not caching.settled(f'author:{author_id}'):
+        return None
+    return _feed_last_modified(f'author:{author_id}',
+                               Post.objects.filter(author_id=author_id))
+
+
+def _post(request, post_id):
+    return _memoize(request, ('post', post_id), lambda: Post.objects.filter(
+        pk=post_id).values('author_id', 'pub_date').first())
+
+
+def _settled_post(request, post_id):
+    post = _post(request, post_id)
+    if post is None or not caching.settled(f'author:{post["author_id"]}'):
+        return None
+    return post
+
+
+def post_etag(request, username, post_id):
+    post = _settled_post(request, post_id)
+    if post is None:
+        return None
+    # Правка поста и комментарии к нему сбрасывают ленту автора
+    return _tag(request, caching.version(f'author:{post["author_id"]}'),
+                *_author_state(request, post['author_id']))
+
+
+def post_last_modified(request, username, post_id):
+    post = _settled_post(request, post_id)
+    if post is None:
+        return None
+    return _latest(
+        caching.modified(f'author:{post["author_id"]}'),
+        post['pub_date'],
+        Comment.objects.filter(post_id=post_id).aggregate(
+            latest=Max('created'))['latest'])
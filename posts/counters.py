@@ -0,0 +1,96 @@
+"""Денормализованные счётчики постов, комментариев и подписок.
+
+Строка счётчиков создаётся вместе с пользователем, а меняется
+обработчиками сигналов в той же транзакции, что и сама запись;
+``rebuild`` пересчитывает их целиком.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models import (Count, F, IntegerField, OuterRef, Q,
+                              Subquery)
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Post, UserCounter
+
+User = get_user_model()
+
+USER_COUNTERS = {
+    'posts_count': (Post, 'author'),
+    'followers_count': (Follow, 'author'),
+    'following_count': (Follow, 'user'),
+}
+
+
+def _count_subquery(model, field):
+    """Подзапрос с количеством строк ``model``, ссылающихся на внешний
+    объект через ``field``."""
+    rows = (model.objects.filter(**{field: OuterRef('pk')})
+            .order_by().values(field).annotate(total=Count('id'))
+            .values('total'))
+    return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+
+def recount_user(user_id):
+    values = {name: model.objects.filter(**{field: user_id}).count()
+              for name, (model, field) in USER_COUNTERS.items()}
+    counter, _ = UserCounter.objects.update_or_create(
+        user_id=user_id, defaults=values)
+    return counter
+
+
+def create_for(user_id):
+    UserCounter.objects.bulk_create([UserCounter(user_id=user_id)],
+                                    ignore_conflicts=True)
+
+
+def for_user(user):
+    """Счётчики ``user`` только на чтение: если строки нет, у
+    пользователя не было ни постов, ни подписок (см. ``change_user``),
+    и возвращаются несохранённые нули."""
+    counter = UserCounter.objects.filter(user=user).first()
+    if counter is None:
+        counter = UserCounter(user=user)
+    return counter
+
+
+def change_user(user_id, **deltas):
+    updated = UserCounter.objects.filter(user_id=user_id).update(
+        **{name: F(name) + delta for name, delta in deltas.items()})
+    if not updated:
+        recount_user(user_id)
+
+
+def change_comments(post_id, delta):
+    Post.objects.filter(pk=post_id).update(
+        comment_count=F('comment_count') + delta)
+
+
+def rebuild(dry_run=False):
+    """Пересчитывает все счётчики; возвращает число исправленных строк
+    по каждой таблице."""
+    actual = _count_subquery(Comment, 'post')
+    drifted_posts = Post.objects.annotate(actual=actual).exclude(
+        comment_count=F('actual'))
+
+    missing = User.objects.filter(counters__isnull=True)
+    annotations = {f'actual_{name}': _count_subquery(model, field)
+                   for name, (model, field) in USER_COUNTERS.items()}
+    condition = Q()
+    for name in USER_COUNTERS:
+        condition |= ~Q(**{name: F(f'actual_{name}')})
+    drifted_users = UserCounter.objects.annotate(
+        **annotations).filter(condition)
+
+    report = {'posts': drifted_posts.count(),
+              'users': missing.count() + drifted_users.count()}
+    if dry_run:
+        return report
+
+    UserCounter.objects.bulk_create(
+        [UserCounter(user_id=pk) for pk in
+         missing.values_list('pk', flat=True).iterator()],
+        batch_size=500, ignore_conflicts=True)
+    Post.objects.update(comment_count=_count_subquery(Comment, 'post'))
+    UserCounter.objects.update(**{
+        name: _count_subquery(model, field)
+        for name, (model, field) in USER_COUNTERS.items()})
+    return report
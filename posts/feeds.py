@@ -0,0 +1,49 @@
+"""Querysets лент постов.
+
+Все ленты строятся через ``feed_queryset``: автор и группа подгружаются
+одним JOIN, количество комментариев берётся из ``Post.comment_count``,
+а не нужные карточке поста столбцы не читаются.
+"""
+from . import timeline
+from .models import Comment, Post
+
+DEFERRED_FIELDS = (
+    'group__description',
+    'author__password',
+    'author__email',
+    'author__last_login',
+    'author__date_joined',
+)
+COMMENT_ORDERING = ('created', 'id')
+
+
+def feed_queryset(queryset):
+    return (queryset.select_related('author', 'group')
+            .defer(*DEFERRED_FIELDS)
+            .order_by('-pub_date'))
+
+
+def index_feed():
+    return feed_queryset(Post.objects.all())
+
+
+def group_feed(group):
+    return feed_queryset(Post.objects.filter(group=group))
+
+
+def author_feed(author):
+    return feed_queryset(Post.objects.filter(author=author))
+
+
+def follow_feed(user):
+    return feed_queryset(timeline.follow_posts(user)).order_by(
+        *timeline.FEED_ORDERING)
+
+
+def comments_feed(post_id):
+    """Комментарии поста от старых к новым вместе с авторами."""
+    return (Comment.objects.filter(post_id=post_id)
+            .select_related('author')
+            .defer(*(name for name in DEFERRED_FIELDS
+                     if name.startswith('author__')))
+            .order_by(*COMMENT_ORDERING))
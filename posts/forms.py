@@ -1,5 +1,6 @@
 from django import forms
 
+from . import images
 from .models import Post, Comment
 
 
@@ -8,6 +9,18 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ['group', 'text', 'image']
 
+    def save(self, commit=True):
+        post = super().save(commit=False)
+        if 'image' in self.changed_data:
+            # старые превью больше не соответствуют картинке
+            post.thumbnails = ''
+            if self.cleaned_data['image']:
+                images.prepare(post, self.cleaned_data['image'],
+                               self.initial.get('image'))
+        if commit:
+            post.save()
+        return post
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,131 @@
+"""Обработка загруженных картинок постов.
+
+Картинка уменьшается до ``settings.POST_IMAGE_MAX_SIDE`` по большей
+стороне, поворачивается по EXIF и перекодируется в JPEG (или WebP, если
+есть прозрачность) с качеством ``settings.POST_IMAGE_QUALITY``. EXIF с
+координатами и моделью телефона при этом не переносится, остаётся
+только цветовой профиль. Результат пишется во временный файл, который
+хранилище копирует частями.
+
+Загрузки не больше ``settings.POST_IMAGE_INLINE_BYTES`` обрабатываются
+сразу в форме. Большие кладутся как есть в
+``settings.POST_IMAGE_STAGING_ROOT``, который не раздаётся, и попадают в
+пост только после обработки фоновой задачей; до этого у поста остаётся
+прежняя картинка. Анимированные картинки не трогаются.
+"""
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from PIL import Image, ImageOps
+
+from . import caching, tasks, thumbnails
+from .models import Post
+
+
+def _has_alpha(image):
+    if 'transparency' in image.info:
+        return True
+    if image.mode not in ('RGBA', 'LA'):
+        return False
+    return image.getchannel('A').getextrema()[0] < 255
+
+
+def process(source, name):
+    """Перекодированная картинка из файла ``source`` в виде ``File`` с
+    именем по ``name``; ``None``, если картинку нужно оставить как есть."""
+    image = Image.open(source)
+    if getattr(image, 'is_animated', False):
+        return None
+    side = settings.POST_IMAGE_MAX_SIDE
+    # JPEG сразу декодируется уменьшенным в 2-8 раз: фото с телефона не
+    # разворачивается в память целиком
+    image.draft('RGB', (side, side))
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((side, side), Image.LANCZOS)
+
+    options = {'quality': settings.POST_IMAGE_QUALITY, 'optimize': True}
+    if image.info.get('icc_profile'):
+        options['icc_profile'] = image.info['icc_profile']
+    if _has_alpha(image):
+        image = image.convert('RGBA')
+        image_format, extension = 'WEBP', 'webp'
+    else:
+        image = image.convert('RGB')
+        image_format, extension = 'JPEG', 'jpg'
+        options['progressive'] = True
+
+    output = tempfile.SpooledTemporaryFile(
+        max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+    image.save(output, image_format, **options)
+    output.seek(0)
+    stem = os.path.splitext(os.path.basename(name))[0]
+    return File(output, name=f'{stem}.{extension}')
+
+
+def staging_storage():
+    """Хранилище необработанных загрузок."""
+    return FileSystemStorage(location=settings.POST_IMAGE_STAGING_ROOT)
+
+
+def prepare(post, upload, previous=None):
+    """Подставляет в ``post`` обработанную ``upload``. Большую загрузку
+    откладывает до ``schedule``, оставляя в посте картинку
+    ``previous``."""
+    if upload.size > settings.POST_IMAGE_INLINE_BYTES:
+        post._staged_upload = upload
+        post.image = previous or None
+        return
+    processed = process(upload, upload.name)
+    if processed is not None:
+        post.image = processed
+
+
+def schedule(post):
+    """После сохранения поста ставит в очередь обработку большой
+    картинки, а уже обработанной - превью."""
+    upload = getattr(post, '_staged_upload', None)
+    if upload is None:
+        thumbnails.schedule(post)
+        return
+    post._staged_upload = None
+    staged = staging_storage().save(os.path.basename(upload.name), upload)
+    tasks.enqueue(process_staged, post.pk, staged, post.image.name or '')
+
+
+@tasks.task()
+def process_staged(post_id, staged, previous):
+    """Обрабатывает загрузку ``staged`` и ставит её в пост, если его
+    картинка всё ещё ``previous``."""
+    staging = staging_storage()
+    if not staging.exists(staged):
+        # Повтор уже выполненной задачи
+        return
+    post = Post.objects.filter(pk=post_id, image=previous).only(
+        'image', 'author', 'group').first()
+    if post is None:
+        # Пост удалён или картинку уже заменили
+        staging.delete(staged)
+        return
+    storage = post.image.storage
+    with staging.open(staged) as source:
+        processed = process(source, staged)
+        if processed is None:
+            source.seek(0)
+            processed = File(source, name=os.path.basename(staged))
+        with processed:
+            new_name = storage.save(
+                post.image.field.generate_filename(post, processed.name),
+                processed)
+    updated = Post.objects.filter(pk=post_id, image=previous).update(
+        image=new_name, thumbnails='')
+    if not updated:
+        storage.delete(new_name)
+    staging.delete(staged)
+    if not updated:
+        return
+    post.image = new_name
+    caching.bump_post(post)
+    thumbnails.schedule(post)
@@ -0,0 +1,142 @@
+import asyncio
+import io
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+
+from yatube.asgi_handler import AsgiHandler, build_environ
+
+from .bench_feeds import percentile
+
+MODES = ('wsgi', 'asgi')
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает WSGI и ASGI в одном процессе на медленных '
+            'клиентах: поток WSGI занят всё время обмена с клиентом, '
+            'ASGI ждёт клиента в цикле событий')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='/')
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=50,
+                            help='Одновременных клиентов')
+        parser.add_argument('--threads', type=int, default=8,
+                            help='Потоков обработки в обоих режимах')
+        parser.add_argument('--client-delay', type=float, default=50,
+                            help='Время передачи запроса и ответа '
+                                 'клиенту, мс')
+        parser.add_argument('--modes', nargs='+', choices=MODES,
+                            default=list(MODES))
+        parser.add_argument('--json', action='store_true',
+                            help='Вывести результат в JSON')
+
+    def scope(self, url):
+        parts = urlsplit(url)
+        return {
+            'type': 'http', 'method': 'GET', 'http_version': '1.1',
+            'scheme': 'http', 'path': parts.path or '/',
+            'query_string': parts.query.encode(), 'root_path': '',
+            'headers': [(b'host', b'localhost')],
+            'server': ('localhost', 80), 'client': ('127.0.0.1', 0),
+        }
+
+    def wsgi_client(self, application, executor, scope, delay):
+        def serve():
+            # Синхронный сервер читает запрос и пишет ответ в том же
+            # потоке, что и обрабатывает его
+            time.sleep(delay / 2)
+            statuses = []
+            result = application(
+                build_environ(scope, io.BytesIO()),
+                lambda status, headers: statuses.append(status))
+            try:
+                b''.join(result)
+            finally:
+                result.close()
+            time.sleep(delay / 2)
+            return int(statuses[0].split()[0])
+
+        async def client():
+            return await asyncio.get_running_loop().run_in_executor(
+                executor, serve)
+        return client
+
+    def asgi_client(self, handler, scope, delay):
+        async def client():
+            statuses = []
+
+            async def receive():
+                await asyncio.sleep(delay / 2)
+                return {'type': 'http.request', 'body': b''}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    statuses.append(message['status'])
+                elif not message.get('more_body'):
+                    await asyncio.sleep(delay / 2)
+
+            await handler(scope, receive, send)
+            return statuses[0]
+        return client
+
+    async def drive(self, client, requests, concurrency):
+        slots = asyncio.Semaphore(concurrency)
+        timings = []
+
+        async def one():
+            async with slots:
+                started = time.perf_counter()
+                status = await client()
+                timings.append((time.perf_counter() - started) * 1000)
+            if status != 200:
+                raise CommandError(f'Ответ {status}')
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        return timings, time.perf_counter() - started
+
+    def measure(self, mode, options):
+        application = WSGIHandler()
+        scope = self.scope(options['url'])
+        delay = options['client_delay'] / 1000
+        if mode == 'wsgi':
+            executor = ThreadPoolExecutor(max_workers=options['threads'])
+            client = self.wsgi_client(application, executor, scope, delay)
+        else:
+            handler = AsgiHandler(application, threads=options['threads'])
+            executor = handler.executor
+            client = self.asgi_client(handler, scope, delay)
+        try:
+            timings, elapsed = asyncio.run(self.drive(
+                client, options['requests'], options['concurrency']))
+        finally:
+            executor.shutdown(wait=True)
+        return {
+            'rps': round(options['requests'] / elapsed, 1),
+            'p50_ms': round(percentile(timings, 0.5), 2),
+            'p95_ms': round(percentile(timings, 0.95), 2),
+            'mean_ms': round(statistics.mean(timings), 2),
+        }
+
+    def handle(self, *args, **options):
+        if min(options['requests'], options['concurrency'],
+               options['threads']) < 1:
+            raise CommandError('--requests, --concurrency и --threads '
+                               'должны быть больше нуля')
+        results = {mode: self.measure(mode, options)
+                   for mode in options['modes']}
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f'{"режим":<8}{"запр/с":>10}{"p50, мс":>10}'
+                          f'{"p95, мс":>10}')
+        for mode, result in results.items():
+            self.stdout.write(f'{mode:<8}{result["rps"]:>10}'
+                              f'{result["p50_ms"]:>10}{result["p95_ms"]:>10}')
@@ -0,0 +1,121 @@
+import json
+import statistics
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post, User, UserCounter
+
+VIEWS = ('index', 'group', 'profile', 'post', 'follow_index')
+
+
+def percentile(values, share):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(share * (len(ordered) - 1)))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = ('Замеряет ленты и страницу поста через тестовый клиент: '
+            'p50/p95 времени ответа, число запросов и размер страницы')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50,
+                            help='Запросов на каждую страницу')
+        parser.add_argument('--views', nargs='+', choices=VIEWS,
+                            default=list(VIEWS))
+        parser.add_argument('--page', type=int, default=1,
+                            help='Номер страницы лент')
+        parser.add_argument('--cold', action='store_true',
+                            help='Очищать кэш перед каждым запросом')
+        parser.add_argument('--json', action='store_true',
+                            help='Вывести результат в JSON')
+
+    def targets(self, page):
+        """Самые тяжёлые страницы: популярный автор, самая большая
+        группа, самый комментируемый пост и читатель с наибольшим
+        числом подписок."""
+        author = UserCounter.objects.order_by('-posts_count').first()
+        reader = UserCounter.objects.order_by('-following_count').first()
+        group = Group.objects.annotate(
+            total=Count('group_posts')).order_by('-total').first()
+        post = Post.objects.select_related('author').order_by(
+            '-comment_count').first()
+        if author is None or post is None:
+            raise CommandError('В базе нет постов: запустите seed_yatube')
+        query = f'?page={page}' if page > 1 else ''
+        targets = {
+            'index': (reverse('index') + query, None),
+            'profile': (reverse('profile', args=[author.user.username])
+                        + query, None),
+            'post': (reverse('post', args=[post.author.username, post.id]),
+                     None),
+        }
+        if group is not None:
+            targets['group'] = (reverse('group', args=[group.slug]) + query,
+                                None)
+        if reader is not None and Follow.objects.exists():
+            targets['follow_index'] = (reverse('follow_index') + query,
+                                       User.objects.get(pk=reader.user_id))
+        return targets
+
+    def measure(self, url, user, requests, cold):
+        client = Client()
+        if user is not None:
+            client.force_login(user)
+        timings, queries, sizes = [], [], []
+        executed = []
+
+        def count(execute, sql, params, many, context):
+            executed.append(sql)
+            return execute(sql, params, many, context)
+
+        for _ in range(requests):
+            if cold:
+                cache.clear()
+            executed.clear()
+            # Счётчик вместо журнала запросов DEBUG: журнал ограничен
+            # 9000 записями и сам замедляет страницы с тысячами запросов
+            with connection.execute_wrapper(count):
+                started = time.perf_counter()
+                response = client.get(url)
+                timings.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                raise CommandError(f'{url}: ответ {response.status_code}')
+            queries.append(len(executed))
+            sizes.append(len(response.content))
+        return {
+            'url': url,
+            'p50_ms': round(percentile(timings, 0.5), 2),
+            'p95_ms': round(percentile(timings, 0.95), 2),
+            'queries': round(statistics.mean(queries), 1),
+            'bytes': round(statistics.mean(sizes)),
+        }
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('--requests должно быть больше нуля')
+        targets = self.targets(options['page'])
+        results = {}
+        for view in options['views']:
+            if view not in targets:
+                self.stderr.write(f'{view}: нет данных, пропускаем')
+                continue
+            url, user = targets[view]
+            results[view] = self.measure(url, user, options['requests'],
+                                         options['cold'])
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f'{"страница":<14}{"p50, мс":>10}{"p95, мс":>10}'
+                          f'{"запросов":>10}{"байт":>10}')
+        for view, result in results.items():
+            self.stdout.write(
+                f'{view:<14}{result["p50_ms"]:>10}{result["p95_ms"]:>10}'
+                f'{result["queries"]:>10}{result["bytes"]:>10}')
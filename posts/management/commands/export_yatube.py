@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = ('Выгружает пользователей, группы, посты, комментарии и '
+            'подписки в JSONL (файлы картинок не выгружаются)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', nargs='?', default='-',
+                            help='Файл выгрузки; по умолчанию stdout')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if options['output'] == '-':
+            # Выгрузка идёт в stdout, поэтому итог - в stderr
+            total = transfer.export(self.stdout, options['batch_size'])
+            self.stderr.write(f'Выгружено записей: {total}')
+            return
+        with open(options['output'], 'w', encoding='utf-8') as output:
+            total = transfer.export(output, options['batch_size'])
+        self.stdout.write(f'Выгружено записей: {total}')
@@ -0,0 +1,26 @@
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from posts import caching
+
+
+class Command(BaseCommand):
+    help = 'Показывает попадания и промахи кэша страниц лент'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true',
+                            help='Обнулить счётчики после вывода')
+
+    def handle(self, *args, **options):
+        if isinstance(caches['default'], LocMemCache):
+            self.stderr.write(
+                'Кэш в памяти процесса: счётчики веб-воркеров отсюда не '
+                'видны, включите YATUBE_CACHE=sqlite')
+        for feed, (hits, misses) in caching.stats().items():
+            total = hits + misses
+            ratio = hits / total * 100 if total else 0
+            self.stdout.write(f'{feed}: попаданий {hits}, промахов {misses}, '
+                              f'доля попаданий {ratio:.1f}%')
+        if options['reset']:
+            caching.reset_stats()
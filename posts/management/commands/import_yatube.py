@@ -0,0 +1,28 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = ('Загружает выгрузку export_yatube пачками через bulk_create; '
+            'id постов и комментариев сдвигаются за уже существующие')
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', nargs='?', default='-',
+                            help='Файл выгрузки; по умолчанию stdin')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        importer = transfer.Importer(options['batch_size'])
+        try:
+            if options['input'] == '-':
+                stats = importer.load(sys.stdin)
+            else:
+                with open(options['input'], encoding='utf-8') as lines:
+                    stats = importer.load(lines)
+        except transfer.InvalidDump as exc:
+            raise CommandError(exc)
+        self.stdout.write('Загружено: ' + ', '.join(
+            f'{model} - {count}' for model, count in stats.items()))
@@ -0,0 +1,42 @@
+import json
+
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from yatube import instrumentation
+
+
+class Command(BaseCommand):
+    help = ('Показывает собранные InstrumentationMiddleware замеры по '
+            'view: число запросов к БД, время SQL и шаблонов, размер ответа')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--json', action='store_true',
+                            help='Вывести статистику с гистограммами в JSON')
+        parser.add_argument('--reset', action='store_true',
+                            help='Обнулить статистику после вывода')
+
+    def handle(self, *args, **options):
+        if isinstance(caches['default'], LocMemCache):
+            self.stderr.write(
+                'Кэш в памяти процесса: замеры веб-воркеров отсюда не '
+                'видны, включите YATUBE_CACHE=sqlite')
+        stats = instrumentation.stats()
+        if options['json']:
+            self.stdout.write(json.dumps(stats, indent=2, ensure_ascii=False))
+        elif not stats:
+            self.stdout.write('Замеров нет: проверьте '
+                              'INSTRUMENTATION_SAMPLE_RATE')
+        else:
+            self.stdout.write(
+                f'{"view":<24}{"замеров":>9}{"p50, мс":>9}{"p95, мс":>9}'
+                f'{"SQL":>7}{"SQL, мс":>9}{"шабл., мс":>11}{"байт":>9}')
+            for view, row in stats.items():
+                self.stdout.write(
+                    f'{view:<24}{row["count"]:>9}{row["time_p50"]:>9}'
+                    f'{row["time_p95"]:>9}{row["queries"]:>7}'
+                    f'{row["sql"]:>9}{row["template"]:>11}'
+                    f'{round(row["bytes"]):>9}')
+        if options['reset']:
+            instrumentation.reset()
@@ -0,0 +1,63 @@
+import multiprocessing
+import signal
+import time
+
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connections
+
+from posts import tasks
+
+
+class Command(BaseCommand):
+    help = ('Запускает воркеры фоновой очереди задач: превью, поисковый '
+            'индекс, письма подписчикам')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Число процессов-воркеров')
+        parser.add_argument('--poll', type=float, default=1.0,
+                            help='Пауза, если очередь пуста, с')
+        parser.add_argument('--once', action='store_true',
+                            help='Выполнить готовые задачи и выйти')
+
+    def work(self, poll):
+        # Текущая пачка задач доделывается и по Ctrl+C, и по SIGTERM
+        stopping = []
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: stopping.append(True))
+        while not stopping:
+            # Воркер живёт долго: соединения проверяются, как между
+            # HTTP-запросами
+            close_old_connections()
+            if not tasks.run_pending():
+                time.sleep(poll)
+
+    def handle(self, *args, **options):
+        if options['once']:
+            done = tasks.run_all()
+            self.stdout.write(f'Выполнено задач: {done}')
+            return
+        if options['workers'] < 1:
+            raise CommandError('--workers должно быть больше нуля')
+        if isinstance(caches['default'], LocMemCache):
+            self.stderr.write(
+                'Кэш в памяти процесса: сброс кэша лент из задач не дойдёт '
+                'до веб-воркеров, включите YATUBE_CACHE=sqlite')
+
+        # Соединения, унаследованные при fork, использовать нельзя
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(target=self.work,
+                                    args=(options['poll'],))
+            for _ in range(options['workers'])]
+        for process in processes:
+            process.start()
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
+                process.join()
@@ -0,0 +1,94 @@
+import datetime
+import itertools
+import random
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts import transfer
+
+WORDS = ('пост', 'день', 'город', 'книга', 'утро', 'море', 'кот', 'чай',
+         'работа', 'дорога', 'зима', 'лето', 'фото', 'друг', 'музыка',
+         'вечер', 'код', 'река', 'снег', 'кино', 'сад', 'поезд', 'дом')
+
+
+def zipf_weights(count, exponent):
+    """Накопленные веса закона Ципфа: элемент с рангом ``k`` выбирается
+    пропорционально ``1 / k ** exponent``."""
+    return list(itertools.accumulate(
+        1 / rank ** exponent for rank in range(1, count + 1)))
+
+
+class Command(BaseCommand):
+    help = ('Заполняет базу синтетическими данными со степенным '
+            'распределением авторов, подписчиков и комментариев')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=50000)
+        parser.add_argument('--follows', type=int, default=20000)
+        parser.add_argument('--exponent', type=float, default=1.1,
+                            help='Показатель степени распределений')
+        parser.add_argument('--days', type=int, default=365,
+                            help='За сколько дней распределены посты')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def _text(self, rnd, low, high):
+        return ' '.join(rnd.choices(WORDS, k=rnd.randint(low, high)))
+
+    def records(self, options):
+        rnd = random.Random(options['seed'])
+        # Имена не пересекаются с уже загруженными раньше данными
+        prefix = f'seed{options["seed"]}_'
+        users = [f'{prefix}{number}' for number in range(options['users'])]
+        # Популярность пользователя как автора - по его номеру в списке
+        popular = zipf_weights(len(users), options['exponent'])
+
+        for username in users:
+            yield {'model': 'user', 'username': username,
+                   'first_name': '', 'last_name': '', 'email': ''}
+        groups = [f'{prefix}group{number}'
+                  for number in range(options['groups'])]
+        for slug in groups:
+            yield {'model': 'group', 'title': slug, 'slug': slug,
+                   'description': self._text(rnd, 5, 20)}
+
+        # Посты идут по возрастанию даты, как при обычной публикации
+        now = timezone.now()
+        start = now - datetime.timedelta(days=options['days'])
+        step = (now - start) / max(options['posts'], 1)
+        for number in range(options['posts']):
+            author, = rnd.choices(users, cum_weights=popular)
+            yield {'model': 'post', 'id': number + 1,
+                   'text': self._text(rnd, 3, 60),
+                   'pub_date': (start + step * number).isoformat(),
+                   'author': author,
+                   'group': rnd.choice(groups + [None]) if groups else None,
+                   'image': ''}
+
+        if options['posts']:
+            # Чаще комментируют свежие посты
+            recent = zipf_weights(options['posts'], options['exponent'])
+            for number in range(options['comments']):
+                rank, = rnd.choices(range(options['posts']),
+                                    cum_weights=recent)
+                post_id = options['posts'] - rank
+                yield {'model': 'comment', 'id': number + 1,
+                       'post': post_id, 'author': rnd.choice(users),
+                       'text': self._text(rnd, 1, 20),
+                       'created': (start + step * post_id).isoformat()}
+
+        for _ in range(options['follows']):
+            author, = rnd.choices(users, cum_weights=popular)
+            user = rnd.choice(users)
+            if user != author:
+                yield {'model': 'follow', 'user': user, 'author': author}
+
+    def handle(self, *args, **options):
+        importer = transfer.Importer(options['batch_size'])
+        stats = importer.load_records(self.records(options))
+        self.stdout.write('Создано: ' + ', '.join(
+            f'{model} - {count}' for model, count in stats.items()))
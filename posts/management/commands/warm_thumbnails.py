@@ -0,0 +1,111 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts import thumbnails
+from posts.models import Post
+
+
+def _init_worker():
+    django.setup()
+    # Соединения, унаследованные от родителя при fork, использовать нельзя
+    connections.close_all()
+
+
+def _generate_in_worker(post_id):
+    try:
+        return thumbnails.try_generate(post_id)
+    finally:
+        # Воркер пула живёт долго, соединение не должно висеть между
+        # пачками
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = ('Создаёт превью картинок всех постов пачками в пуле процессов; '
+            'уже созданные превью пропускаются')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Число процессов; 0 - обрабатывать в текущем процессе')
+        parser.add_argument(
+            '--state-file',
+            default=os.path.join(settings.BASE_DIR, '.warm_thumbnails'),
+            help='Файл с id последнего обработанного поста')
+        parser.add_argument('--restart', action='store_true',
+                            help='Начать заново, не читая --state-file')
+
+    def _read_state(self, path, restart):
+        if restart or not os.path.exists(path):
+            return 0
+        with open(path) as state:
+            return int(state.read().strip() or 0)
+
+    def _write_state(self, path, last_id):
+        with open(path, 'w') as state:
+            state.write(str(last_id))
+
+    def _batches(self, last_id, batch_size):
+        posts = Post.objects.exclude(image='').exclude(
+            image__isnull=True).only('image', 'thumbnails').order_by('pk')
+        while True:
+            batch = list(posts.filter(pk__gt=last_id)[:batch_size])
+            if not batch:
+                return
+            last_id = batch[-1].pk
+            yield batch, last_id
+
+    def handle(self, *args, **options):
+        state_file = options['state_file']
+        last_id = self._read_state(state_file, options['restart'])
+        if last_id:
+            self.stdout.write(f'Продолжаем после поста {last_id}')
+
+        pool = None
+        if options['workers']:
+            connections.close_all()
+            pool = ProcessPoolExecutor(max_workers=options['workers'],
+                                       initializer=_init_worker)
+
+        done = skipped = failed = 0
+        started = time.monotonic()
+        try:
+            for batch, last_id in self._batches(last_id,
+                                                options['batch_size']):
+                todo = []
+                for post in batch:
+                    if thumbnails.is_ready(post):
+                        skipped += 1
+                    else:
+                        todo.append(post.pk)
+                if pool is not None:
+                    results = list(pool.map(_generate_in_worker, todo))
+                else:
+                    results = [thumbnails.try_generate(post_id)
+                               for post_id in todo]
+                done += results.count(True)
+                failed += results.count(False)
+                self._write_state(state_file, last_id)
+
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f'До поста {last_id}: создано {done}, пропущено '
+                    f'{skipped}, ошибок {failed}; '
+                    f'{done / max(elapsed, 0.001):.1f} постов/с')
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        if os.path.exists(state_file):
+            os.remove(state_file)
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {elapsed:.1f} с: создано {done}, пропущено '
+            f'{skipped}, ошибок {failed}'))
@@ -0,0 +1,48 @@
+# Generated by Django 2.2.6 on 2026-10-17 18:51
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicate_follows(apps, schema_editor):
+    Follow = apps.get_model('posts', 'Follow')
+    UserCounter = apps.get_model('posts', 'UserCounter')
+    duplicates = (Follow.objects.values('user', 'author').order_by()
+                  .annotate(keep=Min('id'), total=Count('id'))
+                  .filter(total__gt=1))
+    for row in list(duplicates):
+        Follow.objects.filter(user=row['user'], author=row['author']).exclude(
+            id=row['keep']).delete()
+        UserCounter.objects.filter(user=row['author']).update(
+            followers_count=Follow.objects.filter(
+                author=row['author']).count())
+        UserCounter.objects.filter(user=row['user']).update(
+            following_count=Follow.objects.filter(user=row['user']).count())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-pub_date', '-id'], name='post_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', '-pub_date', '-id'], name='post_author_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['group', '-pub_date', '-id'], name='post_group_pub_date_idx'),
+        ),
+        migrations.RunPython(remove_duplicate_follows,
+                             migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('user', 'author'), name='unique_follow'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 2.2.6 on 2026-10-17 23:40
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_task'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='timelineentry',
+            name='pub_date',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunSQL(
+            'UPDATE posts_timelineentry SET pub_date = ('
+            'SELECT pub_date FROM posts_post '
+            'WHERE posts_post.id = posts_timelineentry.post_id)',
+            migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            'INSERT INTO posts_timelineentry (user_id, post_id, pub_date) '
+            'SELECT f.user_id, p.id, p.pub_date FROM posts_follow f '
+            'JOIN posts_post p ON p.author_id = f.author_id '
+            'WHERE NOT EXISTS (SELECT 1 FROM posts_timelineentry e '
+            'WHERE e.user_id = f.user_id AND e.post_id = p.id)',
+            migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['user', '-pub_date', '-post'], name='timeline_user_pub_date_idx'),
+        ),
+    ]
@@ -1,3 +1,5 @@
+import json
+
 from django.db import models
 from django.contrib.auth import get_user_model
 
@@ -26,10 +28,27 @@ class Post(models.Model):
                               help_text='Выберите группу из'
                               'перечисленных, либо пропустите поле')
     image = models.ImageField(upload_to='posts/', blank=True, null=True)
+    comment_count = models.IntegerField(default=0, editable=False)
+    # JSON {размер: адрес превью}, см. posts.thumbnails
+    thumbnails = models.TextField(default='', editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-pub_date', '-id'],
+                         name='post_pub_date_idx'),
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='post_author_pub_date_idx'),
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='post_group_pub_date_idx'),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
+    @property
+    def thumbnail_urls(self):
+        return json.loads(self.thumbnails) if self.thumbnails else {}
+
 
 class Comment(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE,
@@ -40,9 +59,70 @@ class Comment(models.Model):
                             help_text='Добавьте комментарий')
     created = models.DateTimeField('Дата публикации', auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['post', 'created', 'id'],
+                         name='comment_post_created_idx'),
+        ]
+
 
 class Follow(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE,
                              related_name='follower')
     author = models.ForeignKey(User, on_delete=models.CASCADE,
                                related_name='following')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'author'],
+                                    name='unique_follow'),
+        ]
+
+
+class TimelineEntry(models.Model):
+    """Пост в материализованной ленте подписок пользователя."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE,
+                             related_name='timeline')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE,
+                             related_name='timeline_entries')
+    # Копия Post.pub_date: лента сортируется по индексу этой таблицы
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'],
+                                    name='unique_timeline_entry'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-post'],
+                         name='timeline_user_pub_date_idx'),
+        ]
+
+
+class UserCounter(models.Model):
+    """Денормализованные счётчики пользователя."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE,
+                                primary_key=True, related_name='counters')
+    posts_count = models.IntegerField(default=0)
+    followers_count = models.IntegerField(default=0)
+    following_count = models.IntegerField(default=0)
+    # Посты автора не раскладываются по лентам, а подмешиваются при
+    # чтении, см. posts.timeline
+    timeline_pulled = models.BooleanField(default=False)
+
+
+class Task(models.Model):
+    """Задача фоновой очереди, см. posts.tasks."""
+    name = models.CharField(max_length=100)
+    args = models.TextField()
+    # Имя и аргументы: одинаковые ожидающие задачи схлопываются
+    dedup_key = models.CharField(max_length=255, unique=True)
+    run_at = models.DateTimeField(db_index=True)
+    attempts = models.IntegerField(default=0)
+    # Растёт при повторной постановке, в том числе во время выполнения
+    generation = models.IntegerField(default=0)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default='')
+
+    def __str__(self):
+        return f'{self.name}{self.args}'
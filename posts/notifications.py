@@ -0,0 +1,40 @@
+"""Письма подписчикам о новых постах автора.
+
+Рассылка идёт фоновыми задачами: подписчиков у автора могут быть
+тысячи. Каждая задача отправляет через одно соединение с почтовым
+сервером пачку из ``settings.NOTIFICATION_BATCH_SIZE`` писем подписчикам
+с ``user_id`` больше переданного и ставит задачу на следующую пачку.
+Повтор упавшей задачи отправит заново только её пачку.
+"""
+from django.conf import settings
+from django.core import mail
+from django.urls import reverse
+
+from . import tasks
+from .models import Follow, Post
+
+
+def _messages(post, emails):
+    subject = f'Новый пост @{post.author.username}'
+    body = '{}\n\n{}'.format(
+        post.text[:500], reverse('post', args=[post.author.username,
+                                               post.id]))
+    for email in emails:
+        yield mail.EmailMessage(subject, body, to=[email])
+
+
+@tasks.task()
+def notify_followers(post_id, after_user_id=0):
+    post = Post.objects.select_related('author').filter(pk=post_id).first()
+    if post is None:
+        return
+    size = settings.NOTIFICATION_BATCH_SIZE
+    followers = list(Follow.objects.filter(
+        author_id=post.author_id, user_id__gt=after_user_id,
+    ).order_by('user_id').values_list('user_id', 'user__email')[:size])
+    emails = [email for _, email in followers if email]
+    if emails:
+        with mail.get_connection() as connection:
+            connection.send_messages(list(_messages(post, emails)))
+    if len(followers) == size:
+        tasks.enqueue(notify_followers, post_id, followers[-1][0])
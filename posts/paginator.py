@@ -0,0 +1,152 @@
+import base64
+import json
+
+from django.conf import settings
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class NoTotal(TypeError):
+    """У keyset-пагинации нет общего количества объектов и страниц."""
+    # В шаблоне такие значения просто пустые
+    silent_variable_failure = True
+
+
+class CursorPaginator(Paginator):
+    """Keyset-пагинатор: страницы строятся по значениям ключа сортировки
+    последнего/первого элемента, без COUNT(*) и OFFSET. Поэтому
+    ``count``, ``num_pages`` и ``page_range`` бросают ``NoTotal``.
+
+    ``ordering`` - поля, однозначно задающие порядок; все поля должны
+    сортироваться в одном направлении. ``lookups`` - имена тех же ключей в
+    запросе, если сортировать нужно по столбцам присоединённой таблицы с
+    теми же значениями (см. ``posts.timeline.FEED_ORDERING``).
+    """
+
+    def __init__(self, object_list, per_page, ordering=('-pub_date', '-id'),
+                 lookups=None):
+        self.descending = ordering[0].startswith('-')
+        self.fields = [name.lstrip('-') for name in ordering]
+        lookups = lookups or ordering
+        self.lookups = [name.lstrip('-') for name in lookups]
+        super().__init__(object_list.order_by(*lookups), per_page)
+
+    def _no_count(self):
+        raise NoTotal('CursorPaginator не считает общее количество объектов')
+
+    count = num_pages = page_range = property(_no_count)
+
+    def encode_cursor(self, obj, direction):
+        opts = self.object_list.model._meta
+        values = [opts.get_field(name).value_to_string(obj)
+                  for name in self.fields]
+        raw = json.dumps([direction] + values).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        opts = self.object_list.model._meta
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            direction, *values = json.loads(raw.decode())
+            if direction not in ('next', 'prev'):
+                raise ValueError(direction)
+            if len(values) != len(self.fields):
+                raise ValueError(values)
+            values = [opts.get_field(name).to_python(value)
+                      for name, value in zip(self.fields, values)]
+        except Exception as exc:
+            raise InvalidCursor(cursor) from exc
+        return direction, values
+
+    def _seek(self, values, forward):
+        """Условие "строго после (или до) ключа ``values``" в порядке
+        сортировки пагинатора."""
+        lookup = 'lt' if forward == self.descending else 'gt'
+        condition = Q()
+        for index, name in enumerate(self.lookups):
+            step = Q(**{f'{name}__{lookup}': values[index]})
+            for prev_name, prev_value in zip(self.lookups[:index],
+                                             values[:index]):
+                step &= Q(**{prev_name: prev_value})
+            condition |= step
+        return condition
+
+    def page(self, cursor=None):
+        if cursor:
+            direction, values = self.decode_cursor(cursor)
+        else:
+            direction, values = 'next', None
+
+        queryset = self.object_list
+        if direction == 'prev':
+            queryset = queryset.reverse()
+        if values is not None:
+            queryset = queryset.filter(
+                self._seek(values, forward=direction == 'next'))
+
+        items = list(queryset[:self.per_page + 1])
+        has_more = len(items) > self.per_page
+        items = items[:self.per_page]
+        if direction == 'prev':
+            items.reverse()
+            has_next, has_previous = values is not None, has_more
+        else:
+            has_next, has_previous = has_more, values is not None
+        return self._get_page(items, self, has_next, has_previous)
+
+    def get_page(self, cursor=None):
+        """Как и ``Paginator.get_page``, на неверный курсор отдаёт
+        первую страницу."""
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page()
+
+    def _get_page(self, *args, **kwargs):
+        return CursorPage(*args, **kwargs)
+
+
+class CursorPage(Page):
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        super().__init__(object_list, None, paginator)
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return '<Cursor page %s>' % (self.next_cursor or 'end')
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    @property
+    def next_cursor(self):
+        if self._has_next and self.object_list:
+            return self.paginator.encode_cursor(self.object_list[-1], 'next')
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self._has_previous and self.object_list:
+            return self.paginator.encode_cursor(self.object_list[0], 'prev')
+        return None
+
+
+def paginate(request, queryset, lookups=None):
+    """Возвращает страницу ленты в режиме ``settings.FEED_PAGINATION``:
+    ``'cursor'`` - keyset-пагинация по ``?cursor=``, иначе обычная
+    постраничная по ``?page=``."""
+    if settings.FEED_PAGINATION == 'cursor':
+        paginator = CursorPaginator(queryset, settings.PAR_PAGE,
+                                    lookups=lookups)
+        return paginator.get_page(request.GET.get('cursor'))
+    paginator = Paginator(queryset, settings.PAR_PAGE)
+    return paginator.get_page(request.GET.get('page'))
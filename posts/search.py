@@ -0,0 +1,188 @@
+"""Полнотекстовый поиск по постам и комментариям (SQLite FTS5).
+
+Индекс - виртуальная таблица ``posts_search``. ``rowid`` записи кодирует
+объект: ``id * 2`` для поста и ``id * 2 + 1`` для комментария, поэтому
+обновление и удаление записи идут по первичному ключу. Новые и
+изменённые тексты индексируются фоновыми задачами ``sync_posts`` и
+``sync_comments``, удалённые убираются из индекса сразу.
+"""
+import base64
+import json
+
+from django.db import connection, transaction
+from django.db.models.expressions import RawSQL
+
+from . import tasks
+from .feeds import feed_queryset
+from .models import Comment, Post
+
+TABLE = 'posts_search'
+POST, COMMENT = 0, 1
+
+
+def available():
+    return connection.vendor == 'sqlite'
+
+
+def _rowid(kind, object_id):
+    return object_id * 2 + kind
+
+
+def _replace(kind, object_id, post_id, text):
+    if not available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s',
+                       [_rowid(kind, object_id)])
+        cursor.execute(
+            f'INSERT INTO {TABLE} (rowid, text, post_id) VALUES (%s, %s, %s)',
+            [_rowid(kind, object_id), text, post_id])
+
+
+def _remove(kind, object_id):
+    if not available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s',
+                       [_rowid(kind, object_id)])
+
+
+def remove_post(post):
+    _remove(POST, post.id)
+
+
+def remove_comment(comment):
+    _remove(COMMENT, comment.id)
+
+
+def remove_comments(post_id):
+    """Убирает из индекса все комментарии поста одним запросом."""
+    if not available():
+        return
+    rowids = [_rowid(COMMENT, comment_id) for comment_id in
+              Comment.objects.filter(post_id=post_id).values_list(
+                  'id', flat=True).iterator()]
+    with connection.cursor() as cursor:
+        for start in range(0, len(rowids), 500):
+            batch = rowids[start:start + 500]
+            cursor.execute(
+                f'DELETE FROM {TABLE} WHERE rowid IN '
+                f'({", ".join(["%s"] * len(batch))})', batch)
+
+
+@tasks.task(batch=True)
+def sync_posts(batch):
+    """Переиндексирует посты из ``batch`` - кортежей ``(post_id,)``;
+    удалённых к этому времени убирает из индекса."""
+    ids = {post_id for post_id, in batch}
+    texts = dict(Post.objects.filter(pk__in=ids).values_list('id', 'text'))
+    with transaction.atomic():
+        for post_id in ids:
+            if post_id in texts:
+                _replace(POST, post_id, post_id, texts[post_id])
+            else:
+                _remove(POST, post_id)
+
+
+@tasks.task(batch=True)
+def sync_comments(batch):
+    """То же для комментариев: ``batch`` - кортежи ``(comment_id,)``."""
+    ids = {comment_id for comment_id, in batch}
+    rows = {row[0]: row[1:] for row in Comment.objects.filter(
+        pk__in=ids).values_list('id', 'post_id', 'text')}
+    with transaction.atomic():
+        for comment_id in ids:
+            if comment_id in rows:
+                _replace(COMMENT, comment_id, *rows[comment_id])
+            else:
+                _remove(COMMENT, comment_id)
+
+
+def rebuild():
+    """Перестраивает индекс целиком; возвращает число записей."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+        cursor.execute(
+            f'INSERT INTO {TABLE} (rowid, text, post_id) '
+            f'SELECT id * 2, text, id FROM {Post._meta.db_table}')
+        cursor.execute(
+            f'INSERT INTO {TABLE} (rowid, text, post_id) '
+            f'SELECT id * 2 + 1, text, post_id FROM {Comment._meta.db_table}')
+        cursor.execute(f"INSERT INTO {TABLE} ({TABLE}) VALUES ('optimize')")
+        cursor.execute(f'SELECT COUNT(*) FROM {TABLE}')
+        return cursor.fetchone()[0]
+
+
+def to_match(query):
+    """Превращает ввод пользователя в запрос FTS5: каждое слово - фраза
+    в кавычках, поэтому синтаксис FTS5 во вводе не интерпретируется."""
+    words = query.split()
+    return ' '.join('"%s"' % word.replace('"', '""') for word in words)
+
+
+def matching_ids(query, kind):
+    """Подзапрос id постов или комментариев, подходящих под ``query``."""
+    return RawSQL(
+        f'SELECT rowid / 2 FROM {TABLE} '
+        f'WHERE {TABLE} MATCH %s AND rowid %% 2 = %s',
+        [to_match(query), kind])
+
+
+def _encode_cursor(score, rowid):
+    raw = json.dumps([score, rowid]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        score, rowid = json.loads(raw.decode())
+        return float(score), int(rowid)
+    except Exception:
+        return None
+
+
+def search(query, cursor=None, limit=10):
+    """Результаты поиска по убыванию релевантности.
+
+    Возвращает список словарей ``{'post', 'comment'}`` (``comment`` -
+    ``None`` для найденного поста) и курсор следующей страницы.
+    """
+    match = to_match(query)
+    if not match or not available():
+        return [], None
+    sql = (f'SELECT rowid, bm25({TABLE}) FROM {TABLE} '
+           f'WHERE {TABLE} MATCH %s')
+    params = [match]
+    position = _decode_cursor(cursor) if cursor else None
+    if position is not None:
+        sql += (f' AND (bm25({TABLE}) > %s'
+                f' OR (bm25({TABLE}) = %s AND rowid > %s))')
+        params += [position[0], position[0], position[1]]
+    sql += f' ORDER BY bm25({TABLE}), rowid LIMIT %s'
+    params.append(limit + 1)
+    with connection.cursor() as db:
+        db.execute(sql, params)
+        rows = db.fetchall()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(rows[-1][1], rows[-1][0])
+
+    comment_ids = [rowid // 2 for rowid, _ in rows if rowid % 2 == COMMENT]
+    comments = Comment.objects.select_related('author').in_bulk(comment_ids)
+    post_ids = {rowid // 2 for rowid, _ in rows if rowid % 2 == POST}
+    post_ids.update(comment.post_id for comment in comments.values())
+    posts = feed_queryset(Post.objects.all()).in_bulk(post_ids)
+
+    hits = []
+    for rowid, _ in rows:
+        if rowid % 2 == POST:
+            post, comment = posts.get(rowid // 2), None
+        else:
+            comment = comments.get(rowid // 2)
+            post = comment and posts.get(comment.post_id)
+        if post is not None:
+            hits.append({'post': post, 'comment': comment})
+    return hits, next_cursor
@@ -0,0 +1,103 @@
+import threading
+
+from django.db.models.signals import (post_delete, post_init, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+
+from . import caching, counters, notifications, search, tasks, timeline
+from .models import Comment, Follow, Post, User, UserCounter
+
+
+@receiver(post_init, sender=Post)
+def remember_group(sender, instance, **kwargs):
+    instance._saved_group_id = instance.__dict__.get('group_id')
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    # Кэш, счётчики и ленты подписчиков обновляются сразу: автор должен
+    # увидеть свой пост; поиск и письма подождут воркера
+    caching.bump_post(instance, instance._saved_group_id)
+    instance._saved_group_id = instance.group_id
+    tasks.enqueue(search.sync_posts, instance.id)
+    if created:
+        counters.change_user(instance.author_id, posts_count=1)
+        timeline.fan_out(instance)
+        tasks.enqueue(notifications.notify_followers, instance.id)
+
+
+# id постов, которые удаляются в этом потоке: их комментарии уходят
+# каскадом, и пересчитывать для каждого счётчик и ленты незачем
+_deleting = threading.local()
+
+
+def _deleting_posts():
+    if not hasattr(_deleting, 'posts'):
+        _deleting.posts = set()
+    return _deleting.posts
+
+
+@receiver(pre_delete, sender=Post)
+def post_deleting(sender, instance, **kwargs):
+    _deleting_posts().add(instance.pk)
+    search.remove_comments(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    _deleting_posts().discard(instance.pk)
+    caching.bump_post(instance)
+    search.remove_post(instance)
+    counters.change_user(instance.author_id, posts_count=-1)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    tasks.enqueue(search.sync_comments, instance.id)
+    if created:
+        caching.bump_post(instance.post)
+        counters.change_comments(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    if instance.post_id in _deleting_posts():
+        return
+    if Comment.post.is_cached(instance):
+        caching.bump_post(instance.post)
+    else:
+        caching.bump_post_id(instance.post_id)
+    counters.change_comments(instance.post_id, -1)
+    search.remove_comment(instance)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.change_user(instance.author_id, followers_count=1)
+        counters.change_user(instance.user_id, following_count=1)
+        timeline.followers_changed(instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    counters.change_user(instance.author_id, followers_count=-1)
+    counters.change_user(instance.user_id, following_count=-1)
+    timeline.followers_changed(instance.author_id)
+
+
+@receiver(post_save, sender=User)
+def user_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.create_for(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    # Обработчики удаления постов и подписок того же пользователя могли
+    # заново создать строку счётчиков
+    UserCounter.objects.filter(user_id=instance.pk).delete()
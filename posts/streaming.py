@@ -0,0 +1,52 @@
+"""Потоковый рендер страниц.
+
+При ``settings.STREAMING_RENDER`` лента и страница поста отдаются через
+``StreamingHttpResponse``: шаблон страницы рендерится без списка
+элементов, на его месте стоит ``{{ stream }}``. Всё до этого места -
+``<head>``, навигация и шапка страницы - уходит клиенту сразу, затем
+идут порции по ``settings.STREAMING_CHUNK_SIZE`` элементов, затем
+остаток страницы.
+
+Ленивые ``items`` (queryset или страница пагинатора) вычисляются уже
+после отправки шапки. Остальное, что нужно шаблону страницы (автор,
+пагинация с COUNT, уже загруженные view списки), выбирается до ответа.
+Запросы из потока выполняются после выхода из middleware: они читают из
+основной базы, а не с реплики, и не попадают в замеры
+``yatube.instrumentation``.
+"""
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.middleware.csrf import get_token
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+# Пользовательский текст экранируется, так что в шаблоне такой строки
+# не встретится
+MARKER = mark_safe('<!-- stream -->')
+
+
+def render(request, template_name, context, items, chunk_template, name,
+           last_context=None):
+    """Как ``django.shortcuts.render``, но ``items`` выводятся порциями
+    шаблона ``chunk_template`` (порция - в переменной ``name``) на месте
+    ``{{ stream }}``. ``last_context`` добавляется к последней порции."""
+    # CSRF-cookie и Vary: Cookie выставляют middleware, то есть до
+    # рендера порций: токен и сессию нужно затронуть заранее
+    get_token(request)
+    request.user.is_authenticated
+    page = render_to_string(template_name, {**context, 'stream': MARKER},
+                            request)
+    head, tail = page.split(MARKER, 1)
+    size = settings.STREAMING_CHUNK_SIZE
+
+    def chunks():
+        yield head
+        evaluated = list(items)
+        for start in range(0, max(len(evaluated), 1), size):
+            chunk = {name: evaluated[start:start + size]}
+            if start + size >= len(evaluated):
+                chunk.update(last_context or {})
+            yield render_to_string(chunk_template, chunk, request)
+        yield tail
+
+    return StreamingHttpResponse(chunks())
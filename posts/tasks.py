@@ -0,0 +1,156 @@
+"""Фоновая очередь задач в таблице ``posts_task``.
+
+Задача - функция, зарегистрированная декоратором ``task``, и её
+аргументы в JSON. ``enqueue`` пишет строку в той же транзакции, что и
+изменение, которое её породило: задача не теряется при падении процесса
+и не выполняется для откатившейся записи. Одинаковые ожидающие задачи
+(имя и аргументы) схлопываются в одну, а повторная постановка уже
+выполняемой задачи запустит её ещё раз после завершения. Счётчик
+попыток повторная постановка не сбрасывает - его сбрасывает только
+успешное выполнение.
+
+Воркеры (команда ``run_tasks``) забирают до ``settings.TASK_BATCH_SIZE``
+готовых задач за раз; задача с ``batch=True`` получает аргументы всей
+пачки одним вызовом. Упавшая задача повторяется с растущей паузой, после
+``settings.TASK_MAX_ATTEMPTS`` попыток удаляется с записью в лог.
+Задачи должны быть идемпотентны.
+"""
+import datetime
+import json
+import logging
+import traceback
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+def name_of(func):
+    return f'{func.__module__}.{func.__name__}'
+
+
+def task(batch=False):
+    """Регистрирует функцию как задачу. Функция с ``batch=True``
+    вызывается со списком кортежей аргументов."""
+    def register(func):
+        _registry[name_of(func)] = (func, batch)
+        return func
+    return register
+
+
+def enqueue(func, *args, delay=0):
+    """Ставит ``func(*args)`` в очередь не раньше чем через ``delay``
+    секунд."""
+    name = name_of(func)
+    if name not in _registry:
+        raise ValueError(f'{name} не зарегистрирована как задача')
+    encoded = json.dumps(args)
+    run_at = timezone.now() + datetime.timedelta(seconds=delay)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {Task._meta.db_table} '
+            '(name, args, dedup_key, run_at, attempts, generation, '
+            'last_error) VALUES (%s, %s, %s, %s, 0, 0, %s) '
+            'ON CONFLICT (dedup_key) DO UPDATE SET '
+            'generation = generation + 1, '
+            'run_at = MIN(run_at, excluded.run_at)',
+            [name, encoded, f'{name}:{encoded}',
+             connection.ops.adapt_datetimefield_value(run_at), ''])
+
+
+def claim(limit):
+    """Забирает до ``limit`` готовых задач на ``TASK_LEASE_SECONDS``:
+    задачи упавшего воркера после этого заберут другие."""
+    now = timezone.now()
+    with transaction.atomic():
+        tasks = list(Task.objects.filter(
+            Q(locked_until__isnull=True) | Q(locked_until__lt=now),
+            run_at__lte=now).order_by('run_at', 'id')[:limit])
+        Task.objects.filter(pk__in=[item.pk for item in tasks]).update(
+            locked_until=now + datetime.timedelta(
+                seconds=settings.TASK_LEASE_SECONDS),
+            attempts=F('attempts') + 1)
+    for item in tasks:
+        item.attempts += 1
+    return tasks
+
+
+def _call(func, batch, tasks):
+    if batch:
+        func([tuple(json.loads(item.args)) for item in tasks])
+    else:
+        func(*json.loads(tasks[0].args))
+
+
+def _done(tasks):
+    finished = Q()
+    for item in tasks:
+        finished |= Q(pk=item.pk, generation=item.generation)
+    Task.objects.filter(finished).delete()
+    # Остались задачи, поставленные заново во время выполнения
+    Task.objects.filter(pk__in=[item.pk for item in tasks]).update(
+        locked_until=None, attempts=0)
+
+
+def _failed(item):
+    if item.attempts >= settings.TASK_MAX_ATTEMPTS:
+        logger.error('Задача %s не выполнена за %d попыток, удаляем',
+                     item, item.attempts, exc_info=True)
+        # Вместе с повторными постановками: иначе задача, которую
+        # ставят снова и снова, никогда не будет удалена
+        Task.objects.filter(pk=item.pk).delete()
+        return
+    logger.warning('Задача %s упала, попытка %d', item, item.attempts,
+                   exc_info=True)
+    delay = settings.TASK_RETRY_DELAY * 2 ** (item.attempts - 1)
+    Task.objects.filter(pk=item.pk).update(
+        run_at=timezone.now() + datetime.timedelta(seconds=delay),
+        locked_until=None, last_error=traceback.format_exc())
+
+
+def run_pending(limit=None):
+    """Выполняет одну пачку готовых задач; возвращает их число."""
+    tasks = claim(limit or settings.TASK_BATCH_SIZE)
+    groups = {}
+    for item in tasks:
+        groups.setdefault(item.name, []).append(item)
+    for name, group in groups.items():
+        func, batch = _registry.get(name, (None, False))
+        if func is None:
+            logger.error('Неизвестная задача %s, удаляем', name)
+            _done(group)
+            continue
+        if batch and len(group) > 1:
+            try:
+                _call(func, batch, group)
+            except Exception:
+                # Ищем сломанную задачу, выполняя пачку по одной
+                logger.warning('Пачка %s упала', name, exc_info=True)
+            else:
+                _done(group)
+                continue
+        for item in group:
+            try:
+                _call(func, batch, [item])
+            except Exception:
+                _failed(item)
+            else:
+                _done([item])
+    return len(tasks)
+
+
+def run_all():
+    """Выполняет готовые задачи, пока они не кончатся."""
+    total = 0
+    while True:
+        done = run_pending()
+        if not done:
+            return total
+        total += done
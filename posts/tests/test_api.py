@@ -0,0 +1,85 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class FeedApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(username='writer')
+        self.group = Group.objects.create(
+            title='Группа', slug='first', description='Описание')
+        self.post = Post.objects.create(text='Пост в группе',
+                                        author=self.user, group=self.group)
+
+    def test_feeds_return_posts(self):
+        for url in (reverse('api_index'),
+                    reverse('api_group', args=['first']),
+                    reverse('api_profile', args=['writer'])):
+            with self.subTest(url=url):
+                data = self.client.get(url).json()
+                self.assertEqual(data['results'], [{
+                    'id': self.post.id,
+                    'text': 'Пост в группе',
+                    'pub_date': self.post.pub_date.isoformat(),
+                    'author': 'writer',
+                    'group': 'first',
+                    'image': None,
+                    'comment_count': 0,
+                }])
+                self.assertIsNone(data['next'])
+
+    def test_unknown_group_or_author(self):
+        self.assertEqual(self.client.get(
+            reverse('api_group', args=['missing'])).status_code, 404)
+        self.assertEqual(self.client.get(
+            reverse('api_profile', args=['missing'])).status_code, 404)
+
+    def test_pagination_links(self):
+        Post.objects.bulk_create(
+            Post(text=f'Пост {number}', author=self.user)
+            for number in range(12))
+        data = self.client.get(reverse('api_index')).json()
+        self.assertEqual(len(data['results']), 10)
+        self.assertEqual(data['next'], reverse('api_index') + '?page=2')
+        data = self.client.get(data['next']).json()
+        self.assertEqual(len(data['results']), 3)
+        self.assertEqual(data['previous'], reverse('api_index') + '?page=1')
+
+    def test_not_modified_until_feed_changes(self):
+        url = reverse('api_group', args=['first'])
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['text'],
+                         'Исправленный пост')
+
+    def test_pages_have_different_etags(self):
+        url = reverse('api_index')
+        self.assertNotEqual(self.client.get(url)['ETag'],
+                            self.client.get(url, {'page': 2})['ETag'])
+
+    def test_if_modified_since(self):
+        url = reverse('api_index')
+        last_modified = self.client.get(url)['Last-Modified']
+        response = self.client.get(url,
+                                   HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_read_only(self):
+        self.assertEqual(
+            self.client.post(reverse('api_index')).status_code, 405)
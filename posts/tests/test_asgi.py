@@ -0,0 +1,168 @@
+import asyncio
+import json
+import threading
+from io import BytesIO, StringIO
+
+from django.core.handlers.wsgi import WSGIRequest
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from yatube.asgi import application
+from yatube.asgi_handler import AsgiHandler, build_environ
+
+
+def scope(path='/', query=b'', method='GET', headers=()):
+    return {'type': 'http', 'method': method, 'path': path,
+            'query_string': query, 'headers': list(headers),
+            'server': ('localhost', 8000), 'client': ('10.0.0.1', 5000)}
+
+
+def call(handler, scope, messages):
+    """Прогоняет запрос через ASGI-приложение; возвращает отправленное."""
+    sent = []
+    messages = list(messages)
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(handler(scope, receive, send))
+    return sent
+
+
+class BuildEnvironTests(SimpleTestCase):
+    def test_request_line_and_headers(self):
+        environ = build_environ(scope(
+            '/группа/', b'page=2', 'POST',
+            [(b'content-type', b'text/plain'), (b'x-tag', b'a'),
+             (b'x-tag', b'b')]), None)
+        self.assertEqual(environ['REQUEST_METHOD'], 'POST')
+        self.assertEqual(environ['PATH_INFO'].encode('latin-1').decode(),
+                         '/группа/')
+        self.assertEqual(environ['QUERY_STRING'], 'page=2')
+        self.assertEqual(environ['CONTENT_TYPE'], 'text/plain')
+        self.assertEqual(environ['HTTP_X_TAG'], 'a,b')
+        self.assertEqual(environ['SERVER_PORT'], '8000')
+        self.assertEqual(environ['REMOTE_ADDR'], '10.0.0.1')
+
+    def test_split_cookie_headers_are_joined_as_cookies(self):
+        environ = build_environ(scope('/', headers=[
+            (b'cookie', b'sessionid=abc'), (b'cookie', b'csrftoken=xyz')]),
+            None)
+        self.assertEqual(environ['HTTP_COOKIE'],
+                         'sessionid=abc; csrftoken=xyz')
+        request = WSGIRequest({**environ, 'wsgi.input': BytesIO()})
+        self.assertEqual(request.COOKIES,
+                         {'sessionid': 'abc', 'csrftoken': 'xyz'})
+
+    def test_path_is_decoded_even_with_raw_path(self):
+        # Серверы ASGI всегда передают raw_path в %-кодировке
+        request = scope('/yatube/иван/')
+        request['raw_path'] = b'/yatube/%D0%B8%D0%B2%D0%B0%D0%BD/'
+        request['root_path'] = '/yatube'
+        environ = build_environ(request, None)
+        self.assertEqual(environ['SCRIPT_NAME'], '/yatube')
+        self.assertEqual(environ['PATH_INFO'].encode('latin-1').decode(),
+                         '/иван/')
+
+
+class ClosingBody(list):
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class AsgiHandlerTests(SimpleTestCase):
+    def test_passes_body_and_streams_chunks(self):
+        body = ClosingBody([b'first', b'', b'second'])
+
+        def wsgi(environ, start_response):
+            self.assertEqual(environ['wsgi.input'].read(), b'abcdef')
+            start_response('201 Created', [('X-Test', '1')])
+            return body
+
+        sent = call(AsgiHandler(wsgi, threads=2), scope(method='POST'), [
+            {'type': 'http.request', 'body': b'abc', 'more_body': True},
+            {'type': 'http.request', 'body': b'def'},
+        ])
+        self.assertEqual(sent[0], {'type': 'http.response.start',
+                                   'status': 201,
+                                   'headers': [(b'x-test', b'1')]})
+        self.assertEqual([message['body'] for message in sent[1:]],
+                         [b'first', b'second', b''])
+        self.assertFalse(sent[-1].get('more_body'))
+        self.assertTrue(body.closed)
+
+    def test_view_iteration_and_close_share_thread(self):
+        threads = set()
+
+        class Body(ClosingBody):
+            def __iter__(self):
+                for chunk in super().__iter__():
+                    threads.add(threading.get_ident())
+                    yield chunk
+
+            def close(self):
+                threads.add(threading.get_ident())
+
+        def wsgi(environ, start_response):
+            threads.add(threading.get_ident())
+            start_response('200 OK', [])
+            return Body([b'a', b'b', b'c'])
+
+        handler = AsgiHandler(wsgi, threads=4)
+        for _ in range(5):
+            threads.clear()
+            call(handler, scope(), [{'type': 'http.request', 'body': b''}])
+            self.assertEqual(len(threads), 1)
+
+    def test_view_error_propagates(self):
+        def wsgi(environ, start_response):
+            raise RuntimeError('view')
+
+        with self.assertRaises(RuntimeError):
+            call(AsgiHandler(wsgi, threads=1), scope(),
+                 [{'type': 'http.request', 'body': b''}])
+
+    def test_disconnect_before_body_skips_application(self):
+        def wsgi(environ, start_response):
+            raise AssertionError('приложение не должно вызываться')
+
+        sent = call(AsgiHandler(wsgi, threads=1), scope(),
+                    [{'type': 'http.disconnect'}])
+        self.assertEqual(sent, [])
+
+    def test_lifespan_shuts_down_pool(self):
+        handler = AsgiHandler(None, threads=1)
+        executor = handler.executor
+        sent = call(handler, {'type': 'lifespan'}, [
+            {'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}])
+        self.assertEqual([message['type'] for message in sent],
+                         ['lifespan.startup.complete',
+                          'lifespan.shutdown.complete'])
+        self.assertTrue(executor._shutdown)
+
+    def test_django_page(self):
+        # Страница без базы: тестовая база в памяти недоступна из пула
+        sent = call(application, scope(
+            '/about/author/', headers=[(b'host', b'localhost')]),
+            [{'type': 'http.request', 'body': b''}])
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertIn('Об авторе'.encode(),
+                      b''.join(message['body'] for message in sent[1:]))
+
+
+class BenchAsgiTests(SimpleTestCase):
+    def test_reports_both_modes(self):
+        out = StringIO()
+        call_command('bench_asgi', '--url=/about/author/', '--requests=8',
+                     '--concurrency=4', '--threads=2', '--client-delay=1',
+                     '--json', stdout=out)
+        results = json.loads(out.getvalue())
+        self.assertEqual(set(results), {'wsgi', 'asgi'})
+        for result in results.values():
+            self.assertGreater(result['rps'], 0)
+            self.assertLessEqual(result['p50_ms'], result['p95_ms'])
@@ -0,0 +1,51 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import F
+from django.test import TestCase
+
+from ..models import Comment, Follow, Group, Post, TimelineEntry, User
+
+
+class SeedAndBenchTests(TestCase):
+    def seed(self, **options):
+        options = {'users': 30, 'groups': 3, 'posts': 200, 'comments': 300,
+                   'follows': 150, 'batch_size': 50, **options}
+        call_command('seed_yatube', stdout=StringIO(), **options)
+
+    def test_seed_builds_skewed_dataset(self):
+        self.seed()
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Comment.objects.count(), 300)
+        self.assertTrue(TimelineEntry.objects.exists())
+        # Первый пользователь - самый популярный автор
+        top = User.objects.get(username='seed0_0')
+        self.assertGreater(top.counters.posts_count, 200 / 30)
+        self.assertGreater(top.counters.followers_count, 150 / 30)
+        self.assertFalse(Follow.objects.filter(
+            user_id=F('author_id')).exists())
+
+    def test_seed_is_reproducible(self):
+        self.seed(seed=7)
+        first = list(Post.objects.order_by('id').values_list(
+            'text', 'author__username'))
+        Post.objects.all().delete()
+        self.seed(seed=7)
+        second = list(Post.objects.order_by('id').values_list(
+            'text', 'author__username'))
+        self.assertEqual(first, second)
+
+    def test_bench_reports_every_view(self):
+        self.seed()
+        out = StringIO()
+        call_command('bench_feeds', '--requests=3', '--json', stdout=out)
+        results = json.loads(out.getvalue())
+        self.assertEqual(set(results), {'index', 'group', 'profile', 'post',
+                                        'follow_index'})
+        for result in results.values():
+            self.assertLessEqual(result['p50_ms'], result['p95_ms'])
+            self.assertGreater(result['queries'], 0)
+            self.assertGreater(result['bytes'], 0)
@@ -0,0 +1,103 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import caching
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class IndexCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.user = User.objects.create_user(username='writer')
+        self.post = Post.objects.create(text='Первый пост', author=self.user)
+
+    def test_index_page_served_from_cache(self):
+        self.guest_client.get(reverse('index'))
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(reverse('index'))
+        self.assertContains(response, 'Первый пост')
+
+    def test_writes_invalidate_index(self):
+        self.guest_client.get(reverse('index'))
+
+        Post.objects.create(text='Второй пост', author=self.user)
+        self.assertContains(
+            self.guest_client.get(reverse('index')), 'Второй пост')
+
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        self.assertContains(
+            self.guest_client.get(reverse('index')), 'Исправленный пост')
+
+        Comment.objects.create(post=self.post, author=self.user, text='Да')
+        self.assertContains(
+            self.guest_client.get(reverse('index')), 'Комментариев: 1')
+
+        self.post.delete()
+        self.assertNotContains(
+            self.guest_client.get(reverse('index')), 'Исправленный пост')
+
+
+class GroupAuthorCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.user = User.objects.create_user(username='writer')
+        self.other = User.objects.create_user(username='other')
+        self.group = Group.objects.create(
+            title='Группа', slug='first', description='Описание')
+        self.other_group = Group.objects.create(
+            title='Другая', slug='second', description='Описание')
+        self.post = Post.objects.create(text='Пост в группе',
+                                        author=self.user, group=self.group)
+
+    def get(self, name, **kwargs):
+        return self.guest_client.get(reverse(name, kwargs=kwargs))
+
+    def test_post_invalidates_only_its_feeds(self):
+        self.get('group', slug='second')
+        self.get('profile', username='other')
+
+        Post.objects.create(text='Новый пост', author=self.user,
+                            group=self.group)
+
+        # id группы для ETag и сама группа
+        with self.assertNumQueries(2):
+            self.get('group', slug='second')
+        self.assertContains(self.get('group', slug='first'), 'Новый пост')
+        self.assertContains(self.get('profile', username='writer'),
+                            'Новый пост')
+
+    def test_moved_post_leaves_old_group(self):
+        self.assertContains(self.get('group', slug='first'), 'Пост в группе')
+        self.post.group = self.other_group
+        self.post.save()
+        self.assertNotContains(self.get('group', slug='first'),
+                               'Пост в группе')
+        self.assertContains(self.get('group', slug='second'),
+                            'Пост в группе')
+
+    def test_hit_and_miss_counters(self):
+        self.get('group', slug='first')
+        self.get('group', slug='first')
+        out, err = StringIO(), StringIO()
+        call_command('feed_cache_stats', '--reset', stdout=out, stderr=err)
+        self.assertIn('group: попаданий 1, промахов 1', out.getvalue())
+        self.assertIn('YATUBE_CACHE=sqlite', err.getvalue())
+        self.assertEqual(caching.stats()['group'], (0, 0))
+
+    @override_settings(FEED_STATS_FLUSH_SECONDS=3600)
+    def test_counters_are_not_written_on_every_read(self):
+        caching.reset_stats()
+        self.get('group', slug='first')
+        self.get('group', slug='first')
+        self.assertIsNone(cache.get(caching._stats_key('group', 'hits')))
+        self.assertEqual(caching.stats()['group'], (1, 1))
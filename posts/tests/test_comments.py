@@ -0,0 +1,114 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import search, tasks
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+@override_settings(COMMENTS_PER_PAGE=3)
+class CommentPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.author = User.objects.create_user(username='writer')
+        self.post = Post.objects.create(text='Пост', author=self.author)
+        # Одинаковое время создания: порядок держится на id
+        self.comments = Comment.objects.bulk_create(
+            Comment(post=self.post, author=self.author, text=f'Ответ {n}')
+            for n in range(7))
+        # bulk_create не вызывает сигналы счётчиков
+        Post.objects.filter(pk=self.post.pk).update(comment_count=7)
+        self.comment_ids = list(Comment.objects.order_by(
+            'created', 'id').values_list('id', flat=True))
+        self.more_url = reverse('post_comments',
+                                args=['writer', self.post.id])
+
+    def test_post_page_shows_first_comments(self):
+        response = self.client.get(
+            reverse('post', args=['writer', self.post.id]))
+        comments = response.context['comments']
+        self.assertEqual([comment.id for comment in comments],
+                         self.comment_ids[:3])
+        self.assertTrue(response.context['more_comments_url'].startswith(
+            self.more_url + '?cursor='))
+        self.assertContains(response, 'Показать ещё')
+
+    def test_no_load_more_when_all_shown(self):
+        Comment.objects.filter(id__in=self.comment_ids[3:]).delete()
+        response = self.client.get(
+            reverse('post', args=['writer', self.post.id]))
+        self.assertEqual(len(response.context['comments']), 3)
+        self.assertIsNone(response.context['more_comments_url'])
+
+    def test_load_more_walks_all_comments(self):
+        url = reverse('post', args=['writer', self.post.id])
+        url = self.client.get(url).context['more_comments_url']
+        seen = self.comment_ids[:3]
+        while url:
+            response = self.client.get(url)
+            self.assertTemplateUsed(response, 'includes/comment_list.html')
+            seen += [comment.id for comment in response.context['comments']]
+            url = response.context['more_comments_url']
+        self.assertEqual(seen, self.comment_ids)
+
+    def test_json_chunk(self):
+        response = self.client.get(self.more_url, {'format': 'json'})
+        data = response.json()
+        self.assertEqual([item['id'] for item in data['comments']],
+                         self.comment_ids[:3])
+        self.assertEqual(data['comments'][0]['author'], 'writer')
+        data = self.client.get(data['next']).json()
+        self.assertEqual([item['id'] for item in data['comments']],
+                         self.comment_ids[3:6])
+
+    def test_chunk_queries_do_not_grow_with_comments(self):
+        # Три запроса условного GET, пост и одна выборка комментариев
+        # вместе с авторами
+        with self.assertNumQueries(5):
+            self.client.get(self.more_url)
+
+    def test_unknown_post_or_author(self):
+        other = reverse('post_comments', args=['nobody', self.post.id])
+        self.assertEqual(self.client.get(other).status_code, 404)
+        self.assertEqual(
+            self.client.post(self.more_url).status_code, 405)
+
+
+class CommentDeletionTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='writer')
+
+    def post_with_comments(self, count):
+        post = Post.objects.create(text='Пост', author=self.author)
+        for number in range(count):
+            Comment.objects.create(post=post, author=self.author,
+                                   text=f'Ответ {number}')
+        tasks.run_all()
+        return Post.objects.get(pk=post.pk)
+
+    def deletion_queries(self, post):
+        with CaptureQueriesContext(connection) as queries:
+            post.delete()
+        return len(queries)
+
+    def test_post_deletion_does_not_grow_with_comments(self):
+        few = self.deletion_queries(self.post_with_comments(3))
+        many = self.deletion_queries(self.post_with_comments(30))
+        self.assertEqual(few, many)
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {search.TABLE}')
+            self.assertEqual(cursor.fetchone()[0], 0)
+
+    def test_comment_deletion_updates_counter_and_index(self):
+        post = self.post_with_comments(2)
+        Comment.objects.filter(text='Ответ 0').get().delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
+        hits, _ = search.search('Ответ')
+        self.assertEqual([hit['comment'].text for hit in hits], ['Ответ 1'])
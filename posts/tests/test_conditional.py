@@ -0,0 +1,75 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.user = User.objects.create_user(username='writer')
+        self.reader = User.objects.create_user(username='reader')
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.group = Group.objects.create(
+            title='Группа', slug='first', description='Описание')
+        self.post = Post.objects.create(text='Пост в группе',
+                                        author=self.user, group=self.group)
+        self.urls = (
+            reverse('group', args=['first']),
+            reverse('profile', args=['writer']),
+            reverse('post', args=['writer', self.post.id]),
+        )
+
+    def assertNotModified(self, client, url, etag, expected=True):
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304 if expected else 200)
+        return response
+
+    def test_unchanged_pages_are_not_rendered(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertTrue(response.has_header('Last-Modified'))
+                response = self.assertNotModified(
+                    self.guest_client, url, response['ETag'])
+                self.assertIsNone(response.context)
+
+    def test_edit_and_comment_change_etag(self):
+        etags = {url: self.guest_client.get(url)['ETag']
+                 for url in self.urls}
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                self.assertNotModified(self.guest_client, url, etag, False)
+
+        url = reverse('post', args=['writer', self.post.id])
+        etag = self.guest_client.get(url)['ETag']
+        Comment.objects.create(post=self.post, author=self.reader, text='Да')
+        self.assertNotModified(self.guest_client, url, etag, False)
+
+    def test_etag_depends_on_viewer(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)['ETag']
+                self.assertNotModified(self.reader_client, url, etag, False)
+
+    def test_follow_changes_profile_etag(self):
+        url = reverse('profile', args=['writer'])
+        etag = self.reader_client.get(url)['ETag']
+        Follow.objects.create(user=self.reader, author=self.user)
+        response = self.assertNotModified(self.reader_client, url, etag,
+                                          False)
+        self.assertContains(response, 'Отписаться')
+
+    def test_missing_objects_still_404(self):
+        self.assertEqual(self.guest_client.get(
+            reverse('group', args=['missing'])).status_code, 404)
+        self.assertEqual(self.guest_client.get(
+            reverse('profile', args=['missing'])).status_code, 404)
@@ -0,0 +1,81 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from yatube import db_router
+
+from ..models import Comment, Follow, Post, UserCounter
+
+User = get_user_model()
+
+
+class CountersTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.post = Post.objects.create(text='Пост', author=self.author)
+
+    def test_counters_follow_writes(self):
+        self.reader_client.post(
+            reverse('add_comment', kwargs={'username': 'author',
+                                           'post_id': self.post.id}),
+            {'text': 'Комментарий'})
+        self.reader_client.get(
+            reverse('profile_follow', kwargs={'username': 'author'}))
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+        author = UserCounter.objects.get(user=self.author)
+        self.assertEqual(author.posts_count, 1)
+        self.assertEqual(author.followers_count, 1)
+        self.assertEqual(
+            UserCounter.objects.get(user=self.reader).following_count, 1)
+
+        self.reader_client.get(
+            reverse('profile_unfollow', kwargs={'username': 'author'}))
+        self.assertEqual(
+            UserCounter.objects.get(user=self.author).followers_count, 0)
+
+    def test_profile_shows_counters_without_recount(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        response = self.reader_client.get(
+            reverse('profile', kwargs={'username': 'author'}))
+        self.assertEqual(response.context['number_of_posts'], 1)
+        self.assertEqual(response.context['counters'].followers_count, 1)
+
+    def test_new_user_gets_counters(self):
+        counter = UserCounter.objects.get(user=self.reader)
+        self.assertEqual((counter.posts_count, counter.followers_count,
+                          counter.following_count), (0, 0, 0))
+
+    # Реплика - та же база: важно только, что GET ничего не пишет
+    @override_settings(DATABASE_REPLICAS=['default'])
+    def test_profile_does_not_write_missing_counters(self):
+        UserCounter.objects.filter(user=self.reader).delete()
+        response = self.reader_client.get(
+            reverse('profile', kwargs={'username': 'reader'}))
+        self.assertEqual(response.context['number_of_posts'], 0)
+        self.assertFalse(UserCounter.objects.filter(
+            user=self.reader).exists())
+        self.assertNotIn(db_router.PIN_COOKIE, response.cookies)
+
+    def test_rebuild_counters_fixes_drift(self):
+        Comment.objects.create(post=self.post, author=self.reader, text='Да')
+        Post.objects.update(comment_count=7)
+        UserCounter.objects.filter(user=self.author).update(posts_count=0)
+        UserCounter.objects.filter(user=self.reader).delete()
+
+        out = StringIO()
+        call_command('rebuild_counters', stdout=out)
+
+        self.assertIn('постов - 1, пользователей - 2', out.getvalue())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+        self.assertEqual(
+            UserCounter.objects.get(user=self.author).posts_count, 1)
+        self.assertTrue(UserCounter.objects.filter(user=self.reader).exists())
@@ -0,0 +1,116 @@
+import os
+import sqlite3
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import HttpResponse
+from django.test import (Client, RequestFactory, SimpleTestCase,
+                         TransactionTestCase, override_settings)
+from django.urls import reverse
+
+from yatube import db_router
+
+from ..models import Post
+
+User = get_user_model()
+router = db_router.PrimaryReplicaRouter()
+
+
+@override_settings(DATABASE_REPLICAS=['replica0', 'replica1'])
+class RouterTests(SimpleTestCase):
+    def read_dbs(self, request, reads=1):
+        seen = []
+
+        def view(request):
+            seen.extend(router.db_for_read(Post) for _ in range(reads))
+            return HttpResponse()
+
+        response = db_router.PrimaryPinMiddleware(view)(request)
+        return seen, response
+
+    def read_db(self, request):
+        seen, response = self.read_dbs(request)
+        return seen[0], response
+
+    def test_reads_outside_requests_use_primary(self):
+        self.assertEqual(router.db_for_read(Post), DEFAULT_DB_ALIAS)
+
+    def test_get_reads_from_replica(self):
+        db, response = self.read_db(RequestFactory().get('/'))
+        self.assertIn(db, ('replica0', 'replica1'))
+        self.assertNotIn(db_router.PIN_COOKIE, response.cookies)
+
+    def test_one_replica_per_request(self):
+        seen, _ = self.read_dbs(RequestFactory().get('/'), reads=20)
+        self.assertEqual(len(set(seen)), 1)
+        self.assertEqual(router.db_for_read(Post), DEFAULT_DB_ALIAS)
+
+    def test_writes_and_pinned_clients_use_primary(self):
+        self.assertEqual(router.db_for_write(Post), DEFAULT_DB_ALIAS)
+        db, _ = self.read_db(RequestFactory().post('/'))
+        self.assertEqual(db, DEFAULT_DB_ALIAS)
+        request = RequestFactory().get('/')
+        request.COOKIES[db_router.PIN_COOKIE] = '1'
+        db, _ = self.read_db(request)
+        self.assertEqual(db, DEFAULT_DB_ALIAS)
+
+    def test_only_primary_is_migrated(self):
+        self.assertTrue(router.allow_migrate(DEFAULT_DB_ALIAS, 'posts'))
+        self.assertFalse(router.allow_migrate('replica0', 'posts'))
+
+
+class ReplicaFileTests(TransactionTestCase):
+    """Реплика - отдельный файл SQLite, который не получает новых
+    записей основной базы."""
+    alias = 'replica_test'
+    databases = {DEFAULT_DB_ALIAS, alias}
+
+    @classmethod
+    def setUpClass(cls):
+        handle, cls.path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        connections.databases[cls.alias] = {
+            **connections.databases[DEFAULT_DB_ALIAS],
+            'NAME': cls.path, 'TEST': {'MIRROR': None, 'NAME': cls.path}}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[cls.alias].close()
+        del connections.databases[cls.alias]
+        if hasattr(connections._connections, cls.alias):
+            delattr(connections._connections, cls.alias)
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(cls.path + suffix):
+                os.remove(cls.path + suffix)
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='writer')
+        Post.objects.create(text='Старый пост', author=self.user)
+        primary = connections[DEFAULT_DB_ALIAS]
+        primary.ensure_connection()
+        connections[self.alias].close()
+        target = sqlite3.connect(self.path)
+        primary.connection.backup(target)
+        target.close()
+        Post.objects.create(text='Новый пост', author=self.user)
+
+    @override_settings(DATABASE_REPLICAS=['replica_test'])
+    def test_read_your_writes(self):
+        reader = Client()
+        response = reader.get(reverse('index'))
+        self.assertContains(response, 'Старый пост')
+        self.assertNotContains(response, 'Новый пост')
+
+        writer = Client()
+        writer.force_login(self.user)
+        post = Post.objects.using(self.alias).get()
+        response = writer.post(
+            reverse('add_comment', args=['writer', post.id]),
+            {'text': 'Комментарий'})
+        self.assertIn(db_router.PIN_COOKIE, response.cookies)
+        self.assertContains(writer.get(reverse('index')), 'Новый пост')
@@ -130,9 +130,10 @@ class PostsCreateFormTests(TestCase):
         self.assertRedirects(response, reverse('index'))
         # Проверяем, увеличилось ли число постов
         self.assertEqual(Post.objects.count(), posts_count + 1)
-        # Проверяем, что создалась запись с нашим слагом
+        # Проверяем, что создалась запись с нашим слагом; прозрачный GIF
+        # перекодирован в WebP (см. posts.images)
         self.assertTrue(
             Post.objects.filter(
                 group=form_data['group'],
                 text=form_data['text'],
-                image='posts/small.gif').exists())
+                image='posts/small.webp').exists())
@@ -0,0 +1,150 @@
+import io
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from .. import images, tasks
+from ..models import Post, Task
+
+User = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp(prefix='test_images_')
+STAGING_ROOT = tempfile.mkdtemp(prefix='test_uploads_')
+
+ORIENTATION = 0x0112
+MAKE = 0x010f
+
+
+def picture(size, mode='RGB', image_format='JPEG', exif=None, **options):
+    image = Image.new(mode, size, color=(200, 30, 30, 255)[:len(mode)])
+    if exif:
+        data = Image.Exif()
+        data.update(exif)
+        options['exif'] = data
+    output = io.BytesIO()
+    image.save(output, image_format, **options)
+    output.seek(0)
+    return output
+
+
+def opened(file):
+    file.seek(0)
+    return Image.open(file)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, POST_IMAGE_MAX_SIDE=400)
+class ProcessTests(TestCase):
+    def test_caps_size_rotates_and_strips_exif(self):
+        # Телефон снял кадр боком: ориентация 6 - повернуть на 90°
+        source = picture((1200, 600),
+                         exif={ORIENTATION: 6, MAKE: 'Phone'})
+        result = images.process(source, 'IMG_0001.JPG')
+        self.assertEqual(result.name, 'IMG_0001.jpg')
+        image = opened(result)
+        self.assertEqual(image.format, 'JPEG')
+        self.assertEqual(image.size, (200, 400))
+        self.assertFalse(dict(image.getexif()))
+
+    def test_transparency_keeps_alpha_in_webp(self):
+        transparent = Image.new('RGBA', (50, 50), (0, 0, 0, 0))
+        source = io.BytesIO()
+        transparent.save(source, 'PNG')
+        source.seek(0)
+        result = images.process(source, 'logo.png')
+        self.assertEqual(result.name, 'logo.webp')
+        self.assertEqual(opened(result).mode, 'RGBA')
+
+    def test_opaque_png_becomes_jpeg(self):
+        result = images.process(picture((50, 50), 'RGBA', 'PNG'), 'a.png')
+        self.assertEqual(opened(result).format, 'JPEG')
+
+    def test_animation_is_left_alone(self):
+        frames = [Image.new('P', (10, 10), color) for color in (1, 2)]
+        source = io.BytesIO()
+        frames[0].save(source, 'GIF', save_all=True,
+                       append_images=frames[1:])
+        source.seek(0)
+        self.assertIsNone(images.process(source, 'anim.gif'))
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, POST_IMAGE_MAX_SIDE=400,
+                   POST_IMAGE_STAGING_ROOT=STAGING_ROOT)
+class UploadTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        shutil.rmtree(STAGING_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='photographer')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def upload(self, name='photo.jpg', post=None):
+        upload = SimpleUploadedFile(
+            name, picture((1000, 800), quality=100).getvalue(),
+            content_type='image/jpeg')
+        if post is None:
+            self.client.post(reverse('post_new'),
+                             {'text': 'Фото', 'image': upload})
+            return Post.objects.get(text='Фото')
+        self.client.post(
+            reverse('post_edit', kwargs={'username': 'photographer',
+                                         'post_id': post.pk}),
+            {'text': post.text, 'image': upload})
+        post.refresh_from_db()
+        return post
+
+    def staged(self):
+        return os.listdir(STAGING_ROOT)
+
+    def test_small_upload_is_processed_inline(self):
+        post = self.upload()
+        self.assertEqual(post.image.name, 'posts/photo.jpg')
+        self.assertEqual(post.image.width, 400)
+        self.assertFalse(Task.objects.filter(
+            name='posts.images.process_staged').exists())
+
+    @override_settings(POST_IMAGE_INLINE_BYTES=100)
+    def test_large_upload_is_processed_by_worker(self):
+        post = self.upload('large.jpg')
+        # Оригинал с EXIF не попадает в раздаваемый каталог
+        self.assertFalse(post.image)
+        self.assertEqual(self.staged(), ['large.jpg'])
+        self.assertFalse(default_storage.exists('posts/large.jpg'))
+
+        tasks.run_all()
+        post.refresh_from_db()
+        self.assertEqual(post.image.name, 'posts/large.jpg')
+        self.assertEqual(post.image.width, 400)
+        self.assertEqual(self.staged(), [])
+        # Превью строятся уже по обработанной картинке
+        self.assertIn('card', post.thumbnail_urls)
+
+    @override_settings(POST_IMAGE_INLINE_BYTES=100)
+    def test_edit_keeps_previous_image_until_processed(self):
+        with self.settings(POST_IMAGE_INLINE_BYTES=10 ** 7):
+            post = self.upload('first.jpg')
+        post = self.upload('second.jpg', post)
+        self.assertEqual(post.image.name, 'posts/first.jpg')
+
+        tasks.run_all()
+        post.refresh_from_db()
+        self.assertEqual(post.image.name, 'posts/second.jpg')
+
+    @override_settings(POST_IMAGE_INLINE_BYTES=100)
+    def test_replaced_image_is_not_overwritten(self):
+        post = self.upload('large.jpg')
+        Post.objects.filter(pk=post.pk).update(image='posts/other.jpg')
+        tasks.run_all()
+        post.refresh_from_db()
+        self.assertEqual(post.image.name, 'posts/other.jpg')
+        self.assertEqual(self.staged(), [])
@@ -0,0 +1,75 @@
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from yatube import instrumentation
+
+from ..models import Post
+
+User = get_user_model()
+
+
+@override_settings(INSTRUMENTATION_SAMPLE_RATE=1)
+class InstrumentationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        instrumentation.reset()
+        self.client = Client()
+        self.user = User.objects.create_user(username='writer')
+        self.post = Post.objects.create(text='Пост', author=self.user)
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('index'))
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="\d+ queries"')
+        self.assertIn('tpl;dur=', timing)
+        self.assertIn('total;dur=', timing)
+
+    def test_stats_per_view(self):
+        url = reverse('post', args=['writer', self.post.id])
+        with self.assertLogs('yatube.instrumentation', 'INFO'):
+            self.client.get(url)
+        self.client.get(url)
+        self.client.get(reverse('index'))
+
+        stats = instrumentation.stats()
+        row = stats['post']
+        self.assertEqual(row['count'], 2)
+        self.assertGreater(row['queries'], 0)
+        self.assertGreater(row['template'], 0)
+        self.assertGreater(row['bytes'], 0)
+        self.assertEqual(sum(row['time_histogram'].values()), 2)
+        self.assertEqual(stats['index']['count'], 1)
+
+    def test_sampling_disabled(self):
+        with self.settings(INSTRUMENTATION_SAMPLE_RATE=0):
+            response = self.client.get(reverse('index'))
+        self.assertFalse(response.has_header('Server-Timing'))
+        self.assertEqual(instrumentation.stats(), {})
+
+    def test_request_stats_command(self):
+        self.client.get(reverse('index'))
+        out, err = StringIO(), StringIO()
+        call_command('request_stats', '--json', '--reset', stdout=out,
+                     stderr=err)
+        self.assertEqual(json.loads(out.getvalue())['index']['count'], 1)
+        self.assertEqual(instrumentation.stats(), {})
+        self.assertIn('YATUBE_CACHE=sqlite', err.getvalue())
+
+    @override_settings(INSTRUMENTATION_FLUSH_SECONDS=3600)
+    def test_samples_are_buffered_in_process(self):
+        self.client.get(reverse('index'))
+        self.assertIsNone(
+            cache.get(instrumentation._key('index', 'count', 'total')))
+        self.assertEqual(instrumentation.stats()['index']['count'], 1)
+
+    def test_percentile(self):
+        histogram = [(5, 6), (10, 3), ('inf', 1)]
+        self.assertEqual(instrumentation.percentile(histogram, 10, 0.5), 5)
+        self.assertEqual(instrumentation.percentile(histogram, 10, 0.95),
+                         'inf')
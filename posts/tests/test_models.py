@@ -1,5 +1,6 @@
+from django.db import IntegrityError
 from django.test import TestCase
-from ..models import Group, Post, User
+from ..models import Follow, Group, Post, User
 
 
 class PostsModelTest(TestCase):
@@ -48,3 +49,12 @@ class PostsModelTest(TestCase):
         group = PostsModelTest.group
         title = group.title
         self.assertEqual(title, str(group))
+
+
+class FollowModelTest(TestCase):
+    def test_follow_is_unique(self):
+        user = User.objects.create(username='follower')
+        author = User.objects.create(username='author')
+        Follow.objects.create(user=user, author=author)
+        with self.assertRaises(IntegrityError):
+            Follow.objects.create(user=user, author=author)
@@ -0,0 +1,80 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.template import Context, Template
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Post
+from ..paginator import CursorPaginator, NoTotal
+
+User = get_user_model()
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='CursorUser')
+        for number_post in range(25):
+            Post.objects.create(text=f'Пост {number_post}', author=cls.user)
+        # Половина постов с одинаковой датой: порядок держится на id
+        Post.objects.filter(id__in=Post.objects.order_by('id').values(
+            'id')[:12]).update(pub_date=timezone.now())
+
+    def setUp(self):
+        self.paginator = CursorPaginator(Post.objects.all(), 10)
+
+    def test_pages_cover_feed_in_order(self):
+        """Проход по next_cursor отдаёт всю ленту без пропусков."""
+        expected = list(Post.objects.order_by('-pub_date', '-id'))
+        seen = []
+        page = self.paginator.get_page()
+        self.assertFalse(page.has_previous())
+        while True:
+            seen.extend(page.object_list)
+            if not page.has_next():
+                break
+            page = self.paginator.get_page(page.next_cursor)
+        self.assertEqual(seen, expected)
+
+    def test_previous_cursor_returns_previous_page(self):
+        first = self.paginator.get_page()
+        second = self.paginator.get_page(first.next_cursor)
+        back = self.paginator.get_page(second.previous_cursor)
+        self.assertEqual(list(back.object_list), list(first.object_list))
+        self.assertTrue(back.has_next())
+        self.assertFalse(back.has_previous())
+
+    def test_invalid_cursor_returns_first_page(self):
+        page = self.paginator.get_page('не-курсор')
+        self.assertEqual(list(page.object_list),
+                         list(self.paginator.get_page().object_list))
+
+    def test_no_count_or_offset(self):
+        """Глубокая страница - один запрос без COUNT и OFFSET."""
+        page = self.paginator.get_page(
+            self.paginator.get_page().next_cursor)
+        with CaptureQueriesContext(connection) as queries:
+            self.paginator.get_page(page.next_cursor)
+        self.assertEqual(len(queries), 1)
+        sql = queries[0]['sql'].upper()
+        self.assertNotIn('COUNT(', sql)
+        self.assertNotIn('OFFSET', sql)
+
+    def test_totals_are_unavailable(self):
+        for name in ('count', 'num_pages', 'page_range'):
+            with self.subTest(name=name), self.assertRaises(NoTotal):
+                getattr(self.paginator, name)
+        self.assertEqual(
+            Template('{{ paginator.num_pages }}'
+                     '{% for i in paginator.page_range %}{{ i }}{% endfor %}'
+                     ).render(Context({'paginator': self.paginator})), '')
+
+    @override_settings(FEED_PAGINATION='cursor')
+    def test_index_uses_cursor_links(self):
+        response = Client().get(reverse('index'))
+        page = response.context['page']
+        self.assertEqual(len(page.object_list), 10)
+        self.assertContains(response, f'?cursor={page.next_cursor}')
@@ -0,0 +1,74 @@
+from django.contrib.auth import get_user_model
+from django.template import engines
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from yatube.query_inspector import (DuplicateQueries,
+                                    QueryInspectorMiddleware,
+                                    inspect_queries, shape)
+
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+class QueryInspectorTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='writer')
+        self.post = Post.objects.create(text='Пост', author=self.user)
+        for number in range(5):
+            reader = User.objects.create_user(username=f'reader{number}')
+            Post.objects.create(text=f'Пост {number}', author=reader)
+            Comment.objects.create(post=self.post, author=reader,
+                                   text='Комментарий')
+
+    def test_shape_ignores_in_list_length(self):
+        self.assertEqual(shape('SELECT 1 WHERE id IN (%s, %s, %s)'),
+                         shape('SELECT 1 WHERE id IN (%s)'))
+
+    def test_repeated_query_points_to_code(self):
+        with inspect_queries(duplicates=3) as inspector:
+            authors = [post.author.username for post in Post.objects.all()]
+        self.assertEqual(len(authors), 6)
+        self.assertEqual(len(inspector.repeated), 1)
+        where, = inspector.repeated.values()
+        self.assertIn('posts/tests/test_query_inspector.py', where)
+
+    def test_repeated_query_points_to_template(self):
+        template = engines['django'].from_string(
+            '{% for post in posts %}\n{{ post.author.username }}'
+            '{% endfor %}')
+        with inspect_queries(duplicates=3) as inspector:
+            template.render({'posts': Post.objects.all()})
+        where, = inspector.repeated.values()
+        self.assertIn(':2', where)
+
+    def test_slow_queries_are_logged(self):
+        with self.assertLogs('yatube.query_inspector', 'WARNING') as logs:
+            with inspect_queries(slow_ms=0) as inspector:
+                Post.objects.count()
+            inspector.report('тест')
+        self.assertIn('медленный запрос', logs.output[0])
+
+    @override_settings(QUERY_INSPECTOR='raise',
+                       QUERY_INSPECTOR_DUPLICATES=3)
+    def test_pages_without_n_plus_one(self):
+        client = Client()
+        for url in (reverse('index'),
+                    reverse('profile', args=['writer']),
+                    reverse('post', args=['writer', self.post.id])):
+            with self.subTest(url=url):
+                self.assertEqual(client.get(url).status_code, 200)
+
+    @override_settings(QUERY_INSPECTOR='raise',
+                       QUERY_INSPECTOR_DUPLICATES=3)
+    def test_middleware_raises_on_n_plus_one(self):
+        def n_plus_one(request):
+            names = [post.author.username for post in Post.objects.all()]
+            return HttpResponse(', '.join(names))
+
+        middleware = QueryInspectorMiddleware(n_plus_one)
+        with self.assertLogs('yatube.query_inspector', 'WARNING'):
+            with self.assertRaisesMessage(DuplicateQueries, '6 x SELECT'):
+                middleware(RequestFactory().get('/'))
@@ -0,0 +1,69 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import search, tasks
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='searcher')
+        self.post = Post.objects.create(
+            text='Рецепт борща со сметаной', author=self.user)
+        self.other = Post.objects.create(
+            text='Заметки о погоде', author=self.user)
+        self.comment = Comment.objects.create(
+            post=self.other, author=self.user, text='Лучше борщ, чем дождь')
+
+    def found(self, query, cursor=None, limit=10):
+        tasks.run_all()
+        hits, next_cursor = search.search(query, cursor, limit)
+        return [(hit['post'], hit['comment']) for hit in hits], next_cursor
+
+    def test_finds_posts_and_comments(self):
+        hits, _ = self.found('борща')
+        self.assertEqual(hits, [(self.post, None)])
+        hits, _ = self.found('дождь')
+        self.assertEqual(hits, [(self.other, self.comment)])
+
+    def test_index_follows_edits_and_deletes(self):
+        self.post.text = 'Рецепт окрошки'
+        self.post.save()
+        self.assertEqual(self.found('борща')[0], [])
+        self.assertEqual(self.found('окрошки')[0], [(self.post, None)])
+        self.other.delete()
+        self.assertEqual(self.found('дождь')[0], [])
+
+    def test_cursor_pagination(self):
+        for number in range(5):
+            Post.objects.create(text=f'Суп номер {number}', author=self.user)
+        first, cursor = self.found('суп', limit=3)
+        second, last = self.found('суп', cursor, limit=3)
+        self.assertEqual(len(first), 3)
+        self.assertEqual(len(second), 2)
+        self.assertIsNone(last)
+        self.assertFalse(set(first) & set(second))
+
+    def test_user_input_is_not_fts_syntax(self):
+        self.assertEqual(self.found('борща" OR "')[0], [])
+        self.assertEqual(self.found('NEAR(')[0], [])
+
+    def test_rebuild_search_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {search.TABLE}')
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('Проиндексировано записей: 3', out.getvalue())
+        self.assertEqual(self.found('борща')[0], [(self.post, None)])
+
+    def test_search_page(self):
+        tasks.run_all()
+        response = Client().get(reverse('search'), {'q': 'борща'})
+        self.assertContains(response, 'Рецепт борща со сметаной')
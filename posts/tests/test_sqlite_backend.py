@@ -0,0 +1,63 @@
+import os
+import tempfile
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from yatube.sqlite_backend.base import DatabaseWrapper
+
+from ..models import Group
+
+
+class SQLiteBackendTests(SimpleTestCase):
+    # Тесты открывают отдельные соединения к временным файлам;
+    # без этого pytest-django запрещает доступ к базе
+    databases = '__all__'
+
+    def wrapper(self, **options):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(os.rmdir, directory)
+        path = os.path.join(directory, 'db.sqlite3')
+        settings_dict = {**connection.settings_dict, 'NAME': path,
+                         'OPTIONS': options}
+        wrapper = DatabaseWrapper(settings_dict, alias='tuning')
+
+        def cleanup():
+            wrapper.close()
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+        self.addCleanup(cleanup)
+        return wrapper
+
+    def pragma(self, wrapper, name):
+        with wrapper.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied_on_connect(self):
+        wrapper = self.wrapper(timeout=5, pragmas={
+            'journal_mode': 'WAL', 'synchronous': 'NORMAL',
+            'cache_size': -2048})
+        self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'wal')
+        self.assertEqual(self.pragma(wrapper, 'synchronous'), 1)
+        self.assertEqual(self.pragma(wrapper, 'cache_size'), -2048)
+        self.assertEqual(self.pragma(wrapper, 'busy_timeout'), 5000)
+        self.assertEqual(self.pragma(wrapper, 'foreign_keys'), 1)
+
+    def test_unknown_transaction_mode(self):
+        with self.assertRaises(ImproperlyConfigured):
+            self.wrapper(transaction_mode='LAZY')
+
+
+class TransactionModeTests(TransactionTestCase):
+    def test_atomic_begins_immediate(self):
+        with CaptureQueriesContext(connection) as captured:
+            with transaction.atomic():
+                Group.objects.create(title='Группа', slug='g',
+                                     description='')
+        self.assertEqual(captured[0]['sql'],
+                         f'BEGIN {connection.transaction_mode}')
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
@@ -0,0 +1,84 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+
+def increment(times):
+    cache = caches['shared']
+    for _ in range(times):
+        cache.incr('counter')
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        settings = override_settings(CACHES={
+            'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            },
+            'shared': {
+                'BACKEND': 'yatube.sqlite_cache.SQLiteCache',
+                'LOCATION': os.path.join(self.directory, 'cache.sqlite3'),
+                'OPTIONS': {'MAX_ENTRIES': 10, 'CULL_FREQUENCY': 5,
+                            'CULL_EVERY': 1},
+            },
+        })
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.cache = caches['shared']
+
+    def test_set_get_add_delete(self):
+        self.cache.set('key', {'value': [1, 2]})
+        self.assertEqual(self.cache.get('key'), {'value': [1, 2]})
+        self.assertFalse(self.cache.add('key', 'other'))
+        self.cache.delete('key')
+        self.assertIsNone(self.cache.get('key'))
+        self.assertTrue(self.cache.add('key', 'other'))
+
+    def test_expired_entries_are_missing(self):
+        self.cache.set('key', 'value', timeout=0)
+        self.assertIsNone(self.cache.get('key'))
+        with self.assertRaises(ValueError):
+            self.cache.incr('key')
+
+    def test_incr_is_atomic_across_processes(self):
+        self.cache.set('counter', 0)
+        context = multiprocessing.get_context('fork')
+        workers = [context.Process(target=increment, args=(50,))
+                   for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(self.cache.get('counter'), 200)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        self.cache.set('hot', 'value')
+        self.cache._db.execute(
+            "UPDATE cache SET accessed = accessed + 3600 WHERE key = ?",
+            (self.cache.make_key('hot'),))
+        for number in range(20):
+            self.cache.set(f'cold-{number}', number)
+        self.assertEqual(self.cache.get('hot'), 'value')
+        count, = self.cache._db.execute(
+            'SELECT COUNT(*) FROM cache').fetchone()
+        self.assertLessEqual(count, 10)
+
+    def test_cull_runs_every_n_writes(self):
+        self.cache._cull_every = 5
+        statements = []
+        self.cache._db.set_trace_callback(statements.append)
+        self.addCleanup(self.cache._db.set_trace_callback, None)
+        for number in range(10):
+            self.cache.set(f'key-{number}', number)
+        culls = [sql for sql in statements if sql.startswith('DELETE')]
+        self.assertEqual(len(culls), 2)
+        plan = self.cache._db.execute(
+            'EXPLAIN QUERY PLAN DELETE FROM cache WHERE expires <= 0'
+        ).fetchall()
+        self.assertIn('cache_expires', str(plan))
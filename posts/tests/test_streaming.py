@@ -0,0 +1,82 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Post
+
+User = get_user_model()
+
+
+def content(response):
+    if response.streaming:
+        return b''.join(response.streaming_content).decode()
+    return response.content.decode()
+
+
+def words(response):
+    # Порции отличаются от обычного рендера только переводами строк
+    return content(response).split()
+
+
+@override_settings(STREAMING_CHUNK_SIZE=2, COMMENTS_PER_PAGE=5)
+class StreamingRenderTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='writer')
+        self.reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=self.reader, author=self.author)
+        for number in range(5):
+            self.post = Post.objects.create(text=f'Пост {number}',
+                                            author=self.author)
+        for number in range(7):
+            Comment.objects.create(post=self.post, author=self.reader,
+                                   text=f'Ответ {number}')
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def get(self, url, streaming):
+        cache.clear()
+        with self.settings(STREAMING_RENDER=streaming):
+            response = self.client.get(url)
+        self.assertEqual(response.streaming, streaming)
+        return response
+
+    def test_feeds_match_regular_render(self):
+        for url in (reverse('index'), reverse('follow_index')):
+            with self.subTest(url=url):
+                self.assertEqual(words(self.get(url, True)),
+                                 words(self.get(url, False)))
+
+    def test_head_comes_before_items(self):
+        response = self.get(reverse('index'), True)
+        chunks = [chunk.decode() for chunk in response.streaming_content]
+        self.assertIn('<nav', chunks[0])
+        self.assertNotIn('Пост', chunks[0])
+        # 5 постов порциями по 2
+        self.assertEqual(len(chunks), 1 + 3 + 1)
+        self.assertIn('</html>', chunks[-1])
+
+    def test_feed_items_are_read_after_head(self):
+        response = self.get(reverse('follow_index'), True)
+        chunks = iter(response.streaming_content)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertIn('<nav', next(chunks).decode())
+        self.assertEqual(len(queries), 0)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertIn('Пост 4', next(chunks).decode())
+        self.assertEqual(len(queries), 1)
+
+    def test_post_page_streams_comments_and_sets_csrf_cookie(self):
+        url = reverse('post', args=['writer', self.post.id])
+        response = self.get(url, True)
+        self.assertIn(settings.CSRF_COOKIE_NAME, response.cookies)
+        html = content(response)
+        positions = [html.index(f'Ответ {number}') for number in range(5)]
+        self.assertEqual(positions, sorted(positions))
+        self.assertNotIn('Ответ 5', html)
+        self.assertEqual(html.count('Показать ещё'), 1)
+        self.assertLess(html.index('Ответ 4'), html.index('Показать ещё'))
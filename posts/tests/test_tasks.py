@@ -0,0 +1,170 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .. import search, tasks
+from ..models import Follow, Post, Task
+
+User = get_user_model()
+
+calls = []
+
+
+@tasks.task()
+def record(value):
+    calls.append(value)
+    if value == 'again':
+        calls.remove('again')
+        calls.append('first run')
+        tasks.enqueue(record, 'again')
+
+
+@tasks.task(batch=True)
+def record_batch(batch):
+    if ('bad',) in batch:
+        raise ValueError('bad')
+    calls.append(sorted(value for value, in batch))
+
+
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_duplicates_collapse(self):
+        tasks.enqueue(record, 1)
+        tasks.enqueue(record, 1)
+        tasks.enqueue(record, 2)
+        self.assertEqual(Task.objects.count(), 2)
+        self.assertEqual(tasks.run_all(), 2)
+        self.assertEqual(sorted(calls), [1, 2])
+        self.assertFalse(Task.objects.exists())
+
+    def test_rolled_back_write_drops_task(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            tasks.enqueue(record, 1)
+            raise RuntimeError
+        self.assertFalse(Task.objects.exists())
+
+    def test_delay(self):
+        tasks.enqueue(record, 1, delay=60)
+        self.assertEqual(tasks.run_all(), 0)
+
+    def test_unregistered_function(self):
+        with self.assertRaises(ValueError):
+            tasks.enqueue(print, 1)
+
+    def test_batch_runs_in_one_call(self):
+        for value in 'abc':
+            tasks.enqueue(record_batch, value)
+        tasks.run_pending()
+        self.assertEqual(calls, [['a', 'b', 'c']])
+
+    def test_failing_batch_retries_only_broken_task(self):
+        for value in ('a', 'bad', 'c'):
+            tasks.enqueue(record_batch, value)
+        with self.assertLogs('posts.tasks', 'WARNING'):
+            tasks.run_pending()
+        self.assertEqual(calls, [['a'], ['c']])
+        failed = Task.objects.get()
+        self.assertEqual(failed.attempts, 1)
+        self.assertIsNone(failed.locked_until)
+        self.assertGreater(failed.run_at, timezone.now())
+        self.assertIn('ValueError', failed.last_error)
+
+    @override_settings(TASK_MAX_ATTEMPTS=2, TASK_RETRY_DELAY=0)
+    def test_gives_up_after_max_attempts(self):
+        tasks.enqueue(record_batch, 'bad')
+        with self.assertLogs('posts.tasks', 'WARNING'):
+            tasks.run_pending()
+        with self.assertLogs('posts.tasks', 'ERROR'):
+            tasks.run_pending()
+        self.assertFalse(Task.objects.exists())
+
+    @override_settings(TASK_MAX_ATTEMPTS=2, TASK_RETRY_DELAY=0)
+    def test_reenqueued_failing_task_still_gives_up(self):
+        tasks.enqueue(record_batch, 'bad')
+        with self.assertLogs('posts.tasks', 'WARNING'):
+            tasks.run_pending()
+        tasks.enqueue(record_batch, 'bad')
+        with self.assertLogs('posts.tasks', 'ERROR'):
+            tasks.run_pending()
+        self.assertFalse(Task.objects.exists())
+
+    def test_enqueued_while_running_runs_again(self):
+        tasks.enqueue(record, 'again')
+        tasks.run_pending()
+        self.assertEqual(calls, ['first run'])
+        task = Task.objects.get()
+        self.assertIsNone(task.locked_until)
+        self.assertEqual(task.attempts, 0)
+
+    def test_locked_tasks_are_not_claimed_twice(self):
+        tasks.enqueue(record, 1)
+        self.assertEqual(len(tasks.claim(10)), 1)
+        self.assertEqual(tasks.claim(10), [])
+
+    def test_run_tasks_once(self):
+        tasks.enqueue(record, 1)
+        out = StringIO()
+        call_command('run_tasks', '--once', stdout=out)
+        self.assertEqual(calls, [1])
+        self.assertIn('1', out.getvalue())
+
+
+class PostSideEffectsTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='writer')
+        for number in range(3):
+            reader = User.objects.create_user(
+                username=f'reader{number}',
+                email=f'reader{number}@example.com' if number else '')
+            Follow.objects.create(user=reader, author=self.author)
+
+    def test_new_post_is_indexed_and_announced_by_worker(self):
+        post = Post.objects.create(text='Свежий борщ', author=self.author)
+        self.assertEqual(search.search('борщ')[0], [])
+        self.assertEqual(mail.outbox, [])
+
+        tasks.run_all()
+        hits, _ = search.search('борщ')
+        self.assertEqual([hit['post'] for hit in hits], [post])
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox),
+                         ['reader1@example.com', 'reader2@example.com'])
+        self.assertIn('Свежий борщ', mail.outbox[0].body)
+        self.assertIn(f'/writer/{post.id}/', mail.outbox[0].body)
+
+    @override_settings(NOTIFICATION_BATCH_SIZE=1)
+    def test_notification_retry_does_not_resend_sent_batches(self):
+        Post.objects.create(text='Пост', author=self.author)
+        sent = mail.outbox
+        broken = []
+
+        def send_messages(connection, messages):
+            if messages[0].to == ['reader2@example.com'] and not broken:
+                broken.append(True)
+                raise ConnectionError
+            sent.extend(messages)
+            return len(messages)
+
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.'
+                        'send_messages', send_messages), \
+                self.settings(TASK_RETRY_DELAY=0), \
+                self.assertLogs('posts.tasks', 'WARNING'):
+            tasks.run_all()
+        self.assertEqual(sorted(message.to[0] for message in sent),
+                         ['reader1@example.com', 'reader2@example.com'])
+
+    def test_edit_does_not_notify_again(self):
+        post = Post.objects.create(text='Пост', author=self.author)
+        tasks.run_all()
+        mail.outbox.clear()
+        post.text = 'Исправленный пост'
+        post.save()
+        tasks.run_all()
+        self.assertEqual(mail.outbox, [])
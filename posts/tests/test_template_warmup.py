@@ -0,0 +1,26 @@
+from unittest import mock
+
+from django.conf import settings
+from django.template import engines
+from django.template.loaders.filesystem import Loader
+from django.test import SimpleTestCase
+
+from yatube.template_warmup import template_names, warm_up
+
+
+class TemplateWarmUpTests(SimpleTestCase):
+    def test_templates_compiled_once(self):
+        names = list(template_names(settings.TEMPLATES_DIR))
+        self.assertIn('base.html', names)
+        self.assertIn('includes/post_item.html', names)
+        self.assertEqual(warm_up(), len(names))
+
+        with mock.patch.object(Loader, 'get_contents') as get_contents:
+            for name in names:
+                engines['django'].get_template(name)
+        get_contents.assert_not_called()
+
+    def test_cached_loader_enabled(self):
+        loader, = engines['django'].engine.template_loaders
+        self.assertEqual(type(loader).__module__,
+                         'django.template.loaders.cached')
@@ -0,0 +1,109 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import thumbnails
+from ..models import Post
+
+User = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp(prefix='test_thumbnails_')
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x01\x00'
+    b'\x01\x00\x00\x00\x00\x21\xf9\x04'
+    b'\x01\x0a\x00\x01\x00\x2c\x00\x00'
+    b'\x00\x00\x01\x00\x01\x00\x00\x02'
+    b'\x02\x4c\x01\x00\x3b'
+)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ThumbnailsTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='photographer')
+        self.post = Post.objects.create(
+            text='Пост с картинкой', author=self.user,
+            image=SimpleUploadedFile('small.gif', SMALL_GIF,
+                                     content_type='image/gif'))
+
+    def test_feed_falls_back_to_original_until_generated(self):
+        response = Client().get(reverse('index'))
+        self.assertContains(response, f'src="{self.post.image.url}"')
+
+    def test_generate_stores_rendition_urls(self):
+        thumbnails.generate(self.post.id)
+        self.post.refresh_from_db()
+        url = self.post.thumbnail_urls['card']
+        self.assertTrue(url.startswith('/media/cache/'))
+
+        response = Client().get(reverse('index'))
+        self.assertContains(response, f'src="{url}"')
+
+    def test_new_image_resets_renditions(self):
+        thumbnails.generate(self.post.id)
+        client = Client()
+        client.force_login(self.user)
+        client.post(
+            reverse('post_edit', kwargs={'username': 'photographer',
+                                         'post_id': self.post.id}),
+            {'text': 'Новая картинка',
+             'image': SimpleUploadedFile('other.gif', SMALL_GIF,
+                                         content_type='image/gif')})
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.thumbnail_urls, {})
+
+    def warm(self, *args):
+        out = StringIO()
+        call_command('warm_thumbnails', '--workers', '0', '--state-file',
+                     self.state_file, *args, stdout=out)
+        return out.getvalue()
+
+    def test_warm_thumbnails_generates_and_skips(self):
+        self.state_file = os.path.join(MEDIA_ROOT, 'state')
+        self.assertIn('создано 1, пропущено 0', self.warm())
+        self.post.refresh_from_db()
+        self.assertIn('card', self.post.thumbnail_urls)
+        self.assertIn('создано 0, пропущено 1', self.warm())
+        self.assertFalse(os.path.exists(self.state_file))
+
+    def test_warm_thumbnails_resumes_from_state(self):
+        self.state_file = os.path.join(MEDIA_ROOT, 'state')
+        with open(self.state_file, 'w') as state:
+            state.write(str(self.post.id))
+        self.assertIn(f'Продолжаем после поста {self.post.id}', self.warm())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.thumbnail_urls, {})
+
+    def test_warm_thumbnails_counts_failures_in_process(self):
+        self.state_file = os.path.join(MEDIA_ROOT, 'state')
+        broken = Post.objects.create(text='Битая картинка', author=self.user,
+                                     image='posts/broken.gif')
+        generate = thumbnails.generate
+
+        def fail_on_broken(post_id):
+            if post_id == broken.id:
+                raise OSError('cannot identify image file')
+            generate(post_id)
+
+        with mock.patch.object(thumbnails, 'generate', fail_on_broken), \
+                self.assertLogs('posts.thumbnails', 'ERROR'):
+            output = self.warm()
+        self.assertIn('создано 1, пропущено 0, ошибок 1', output)
+        self.post.refresh_from_db()
+        self.assertIn('card', self.post.thumbnail_urls)
+        broken.refresh_from_db()
+        self.assertEqual(broken.thumbnail_urls, {})
@@ -0,0 +1,101 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import feeds, tasks
+from ..models import Follow, Post, TimelineEntry
+
+User = get_user_model()
+
+
+class TimelineTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_new_post_pushed_to_followers(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=post).exists())
+
+    def test_follow_backfills_and_unfollow_trims(self):
+        old_post = Post.objects.create(text='Старый пост', author=self.author)
+        self.reader_client.get(
+            reverse('profile_follow', kwargs={'username': 'author'}))
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=old_post).exists())
+
+        self.reader_client.get(
+            reverse('profile_unfollow', kwargs={'username': 'author'}))
+        self.assertFalse(TimelineEntry.objects.filter(
+            user=self.reader).exists())
+
+    def follow_page(self, client=None):
+        response = (client or self.reader_client).get(
+            reverse('follow_index'))
+        return list(response.context['page'].object_list)
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_popular_author_pulled_on_read(self):
+        old_post = Post.objects.create(text='До подписки', author=self.author)
+        self.reader_client.get(
+            reverse('profile_follow', kwargs={'username': 'author'}))
+        post = Post.objects.create(text='Пост звезды', author=self.author)
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(self.follow_page(), [post, old_post])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_posts_survive_crossing_fanout_limit(self):
+        """Посты не пропадают из ленты, когда автор переходит порог
+        подписчиков в любую сторону."""
+        other = User.objects.create_user(username='other')
+        other_client = Client()
+        other_client.force_login(other)
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=other, author=self.author)
+        popular_post = Post.objects.create(text='Два подписчика',
+                                           author=self.author)
+        self.assertFalse(TimelineEntry.objects.exists())
+
+        other_client.get(
+            reverse('profile_unfollow', kwargs={'username': 'author'}))
+        self.assertEqual(self.follow_page(), [popular_post])
+        tasks.run_all()
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=popular_post).exists())
+        self.assertEqual(self.follow_page(), [popular_post])
+
+        usual_post = Post.objects.create(text='Один подписчик',
+                                         author=self.author)
+        other_client.get(
+            reverse('profile_follow', kwargs={'username': 'author'}))
+        self.assertEqual(self.follow_page(), [usual_post, popular_post])
+        self.assertEqual(self.follow_page(other_client),
+                         [usual_post, popular_post])
+
+    def test_feed_read_by_timeline_index(self):
+        """Страница ленты читается по индексу без сортировки в памяти."""
+        queryset = feeds.follow_feed(self.reader)[10:20]
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            plan = ' '.join(str(row) for row in cursor.fetchall())
+        self.assertIn('timeline_user_pub_date_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    @override_settings(FEED_PAGINATION='cursor')
+    def test_cursor_pages_cover_feed(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        posts = [Post.objects.create(text=f'Пост {number}', author=self.author)
+                 for number in range(13)]
+        response = self.reader_client.get(reverse('follow_index'))
+        first = list(response.context['page'].object_list)
+        cursor = response.context['page'].next_cursor
+        response = self.reader_client.get(
+            reverse('follow_index'), {'cursor': cursor})
+        second = list(response.context['page'].object_list)
+        self.assertEqual(first + second, posts[::-1])
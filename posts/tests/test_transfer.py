@@ -0,0 +1,112 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from .. import search, transfer
+from ..models import Comment, Follow, Group, Post, TimelineEntry
+
+User = get_user_model()
+
+
+class TransferTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(
+            username='writer', first_name='Лев', last_name='Толстой')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(
+            title='Группа', slug='first', description='Описание')
+        self.post = Post.objects.create(text='Пост в группе',
+                                        author=self.author, group=self.group)
+        self.lonely = Post.objects.create(text='Пост без группы',
+                                          author=self.reader)
+        Comment.objects.create(post=self.post, author=self.reader,
+                               text='Хороший пост')
+        Follow.objects.create(user=self.reader, author=self.author)
+
+    def write_dump(self, content):
+        handle = tempfile.NamedTemporaryFile(
+            'w', suffix='.jsonl', delete=False, encoding='utf-8')
+        with handle:
+            handle.write(content)
+        self.addCleanup(os.remove, handle.name)
+        return handle.name
+
+    def dump(self):
+        output = StringIO()
+        transfer.export(output, batch_size=2)
+        return output.getvalue()
+
+    def test_export_format(self):
+        records = [json.loads(line) for line in self.dump().splitlines()]
+        self.assertEqual([record['model'] for record in records],
+                         ['user', 'user', 'group', 'post', 'post',
+                          'comment', 'follow'])
+        self.assertEqual(records[3]['author'], 'writer')
+        self.assertEqual(records[3]['group'], 'first')
+        self.assertEqual(records[5]['post'], self.post.id)
+        self.assertEqual(records[6], {'model': 'follow', 'user': 'reader',
+                                      'author': 'writer'})
+
+    def test_round_trip_into_empty_database(self):
+        dump = self.dump()
+        pub_date = self.post.pub_date
+        User.objects.all().delete()
+        Group.objects.all().delete()
+
+        stats = transfer.Importer(batch_size=1).load(dump.splitlines())
+
+        self.assertEqual(stats, {'user': 2, 'group': 1, 'post': 2,
+                                 'comment': 1, 'follow': 1})
+        author = User.objects.get(username='writer')
+        self.assertEqual(author.get_full_name(), 'Лев Толстой')
+        self.assertFalse(author.has_usable_password())
+        post = Post.objects.get(text='Пост в группе')
+        self.assertEqual(post.pub_date, pub_date)
+        self.assertEqual(post.group.slug, 'first')
+        self.assertEqual(post.comments.get().author.username, 'reader')
+        self.assertEqual(post.comment_count, 1)
+        self.assertEqual(author.counters.followers_count, 1)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user__username='reader', post=post).exists())
+        if search.available():
+            hits, _ = search.search('хороший')
+            self.assertEqual(hits[0]['post'], post)
+
+    def test_import_next_to_existing_data_remaps_ids(self):
+        dump = self.dump()
+        transfer.Importer().load(dump.splitlines())
+
+        self.assertEqual(User.objects.count(), 2)
+        self.assertEqual(Group.objects.count(), 1)
+        self.assertEqual(Follow.objects.count(), 1)
+        copies = Post.objects.filter(text='Пост в группе').order_by('id')
+        self.assertEqual(copies.count(), 2)
+        copy = copies.last()
+        self.assertEqual(copy.id, self.post.id + self.lonely.id)
+        self.assertEqual(copy.comments.count(), 1)
+        self.assertEqual(self.post.comments.count(), 1)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader, post=copy).exists())
+
+    def test_commands(self):
+        output = StringIO()
+        call_command('export_yatube', stdout=output, stderr=StringIO())
+        dump = output.getvalue()
+        Post.objects.all().delete()
+
+        path = self.write_dump(dump)
+        out = StringIO()
+        call_command('import_yatube', path, '--batch-size=1', stdout=out)
+        self.assertIn('post - 2', out.getvalue())
+        self.assertEqual(Post.objects.count(), 2)
+
+    def test_invalid_dump(self):
+        path = self.write_dump('{"model": "secret"}\n')
+        with self.assertRaises(CommandError):
+            call_command('import_yatube', path, stdout=StringIO())
@@ -2,7 +2,7 @@ from django.contrib.auth import get_user_model
 from django.test import Client, TestCase
 from django.urls import reverse
 
-from ..models import Group, Post, Follow
+from ..models import Comment, Group, Post, Follow
 from django import forms
 
 User = get_user_model()
@@ -115,3 +115,44 @@ class FollowTest(TestCase):
             reverse('profile_follow', kwargs={'username': self.user}))
         self.assertTrue(Follow.objects.filter(user=self.follower,
                                               author=self.user).exists())
+
+
+class FeedQueriesTest(TestCase):
+    """Число запросов на страницу ленты не зависит от числа постов."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='feed_author')
+        cls.reader = User.objects.create_user(username='feed_reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='feed-group', description='Описание')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for number_post in range(12):
+            post = Post.objects.create(text=f'Пост {number_post}',
+                                       author=cls.author, group=cls.group)
+            Comment.objects.create(post=post, author=cls.reader,
+                                   text='Комментарий')
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_feed_pages_query_count(self):
+        # сессия и пользователь для авторизованного клиента,
+        # запросы ETag (id группы или автора и счётчики автора),
+        # pull-авторы в подписках, затем COUNT и страница постов
+        feeds = {
+            reverse('index'): (self.guest_client, 2),
+            reverse('group', kwargs={'slug': 'feed-group'}):
+                (self.guest_client, 4),
+            reverse('profile', kwargs={'username': 'feed_author'}):
+                (self.guest_client, 6),
+            reverse('follow_index'): (self.reader_client, 5),
+        }
+        for url, (client, queries) in feeds.items():
+            with self.subTest(url=url):
+                with self.assertNumQueries(queries):
+                    response = client.get(url)
+                self.assertEqual(
+                    len(response.context['page'].object_list), 10)
@@ -0,0 +1,82 @@
+"""Превью картинок постов.
+
+Размеры из ``settings.POST_THUMBNAILS`` генерируются фоновой задачей
+после сохранения поста (см. ``posts.tasks``), а их адреса записываются в
+``Post.thumbnails``; шаблоны лент только подставляют готовые адреса.
+"""
+import json
+import logging
+
+from django.conf import settings
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile
+
+from . import caching, tasks
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+
+@tasks.task()
+def generate(post_id):
+    """Создаёт все превью поста и сохраняет их адреса."""
+    post = Post.objects.filter(pk=post_id).only(
+        'image', 'author', 'group').first()
+    if post is None or not post.image:
+        return
+    urls = {}
+    for name, (geometry, options) in settings.POST_THUMBNAILS.items():
+        urls[name] = get_thumbnail(post.image, geometry, **options).url
+    # Картинку могли заменить, пока строились превью
+    updated = Post.objects.filter(pk=post_id, image=post.image.name).update(
+        thumbnails=json.dumps(urls))
+    if updated:
+        caching.bump_post(post)
+
+
+def in_kvstore(image, geometry, options):
+    """Есть ли превью в key-value хранилище sorl-thumbnail.
+
+    Имя превью вычисляется так же, как в
+    ``ThumbnailBackend.get_thumbnail``.
+    """
+    backend = default.backend
+    source = ImageFile(image)
+    options = dict(options)
+    if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(sorl_defaults, attr):
+            options.setdefault(key, value)
+    name = backend._get_thumbnail_filename(source, geometry, options)
+    return default.kvstore.get(ImageFile(name, default.storage)) is not None
+
+
+def is_ready(post):
+    """Все превью поста созданы и записаны в ``Post.thumbnails``."""
+    urls = post.thumbnail_urls
+    return all(name in urls and in_kvstore(post.image, geometry, options)
+               for name, (geometry, options)
+               in settings.POST_THUMBNAILS.items())
+
+
+def try_generate(post_id):
+    """``generate`` с записью ошибки в лог; возвращает, удалось ли
+    создать превью."""
+    try:
+        generate(post_id)
+    except Exception:
+        logger.exception('Не удалось создать превью поста %s', post_id)
+        return False
+    return True
+
+
+def schedule(post):
+    """Ставит генерацию превью в очередь задач."""
+    if post.image:
+        tasks.enqueue(generate, post.pk)
@@ -0,0 +1,150 @@
+"""Материализованные ленты подписок.
+
+Новый пост раскладывается (fan-out on write) в ``TimelineEntry`` всех
+подписчиков автора, а при подписке в ленту добавляются все посты автора;
+такая лента читается по индексу ``(user, -pub_date, -post)``.
+
+Автора, у которого подписчиков больше ``settings.TIMELINE_FANOUT_LIMIT``,
+помечают ``UserCounter.timeline_pulled``: его посты не раскладываются, а
+подмешиваются при чтении (pull). Когда подписчиков становится меньше,
+задача ``materialize`` раскладывает его посты и только тогда снимает
+пометку, так что посты не пропадают из лент ни в один из моментов.
+"""
+from itertools import islice
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, FilteredRelation, Q
+
+from . import tasks
+from .models import Follow, Post, TimelineEntry, UserCounter
+
+BATCH_SIZE = 500
+
+
+def _bulk_add(entries):
+    entries = iter(entries)
+    while True:
+        batch = list(islice(entries, BATCH_SIZE))
+        if not batch:
+            break
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def _fan_out(post):
+    followers = Follow.objects.filter(
+        author_id=post.author_id).values_list('user_id', flat=True)
+    _bulk_add(TimelineEntry(user_id=user_id, post_id=post.id,
+                            pub_date=post.pub_date)
+              for user_id in followers.iterator())
+
+
+def is_pulled(author_id):
+    """Подмешиваются ли посты автора при чтении ленты."""
+    return UserCounter.objects.filter(
+        user_id=author_id, timeline_pulled=True).exists()
+
+
+def fan_out(post):
+    """Добавляет пост в ленты подписчиков автора."""
+    if not is_pulled(post.author_id):
+        _fan_out(post)
+
+
+def backfill(user, author):
+    """Заполняет ленту ``user`` постами автора, на которого он
+    подписался."""
+    if is_pulled(author.id):
+        return
+    posts = Post.objects.filter(author=author).values_list('id', 'pub_date')
+    _bulk_add(TimelineEntry(user_id=user.id, post_id=post_id,
+                            pub_date=pub_date)
+              for post_id, pub_date in posts.iterator())
+
+
+def followers_changed(author_id):
+    """Переключает автора между раскладкой и pull, когда число его
+    подписчиков переходит ``TIMELINE_FANOUT_LIMIT``."""
+    counter = UserCounter.objects.filter(user_id=author_id).values_list(
+        'followers_count', 'timeline_pulled').first()
+    if counter is None:
+        return
+    followers_count, pulled = counter
+    if followers_count > settings.TIMELINE_FANOUT_LIMIT and not pulled:
+        UserCounter.objects.filter(user_id=author_id).update(
+            timeline_pulled=True)
+    elif followers_count <= settings.TIMELINE_FANOUT_LIMIT and pulled:
+        tasks.enqueue(materialize, author_id)
+
+
+def _insert(condition, params):
+    sql = (
+        'INSERT INTO {entry} (user_id, post_id, pub_date) '
+        'SELECT f.user_id, p.id, p.pub_date FROM {follow} f '
+        'JOIN {post} p ON p.author_id = f.author_id '
+        'WHERE ({condition}) '
+        'AND NOT EXISTS (SELECT 1 FROM {entry} e '
+        '                WHERE e.user_id = f.user_id AND e.post_id = p.id)'
+    ).format(entry=TimelineEntry._meta.db_table,
+             follow=Follow._meta.db_table,
+             post=Post._meta.db_table,
+             condition=condition)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+@tasks.task()
+def materialize(author_id):
+    """Раскладывает посты автора, у которого подписчиков снова не больше
+    ``TIMELINE_FANOUT_LIMIT``, и в той же транзакции снимает pull."""
+    with transaction.atomic():
+        switched = UserCounter.objects.filter(
+            user_id=author_id, timeline_pulled=True,
+            followers_count__lte=settings.TIMELINE_FANOUT_LIMIT,
+        ).update(timeline_pulled=False)
+        if switched:
+            _insert('f.author_id = %s', [author_id])
+
+
+def trim(user, author):
+    """Убирает из ленты ``user`` посты автора после отписки."""
+    TimelineEntry.objects.filter(user=user, post__author=author).delete()
+
+
+# Сортировка ленты, см. ``follow_posts``
+FEED_ORDERING = ('-feed_date', '-feed_post')
+
+
+def follow_posts(user):
+    """Посты ленты подписок ``user`` с ключами сортировки
+    ``FEED_ORDERING``. Если ``user`` не подписан на pull-авторов, страница
+    читается по индексу ленты, иначе их посты подмешиваются к ней."""
+    pulled = list(Follow.objects.filter(
+        user=user, author__counters__timeline_pulled=True,
+    ).values_list('author_id', flat=True))
+    if pulled:
+        entries = TimelineEntry.objects.filter(user=user).values('post_id')
+        return Post.objects.filter(
+            Q(pk__in=entries) | Q(author_id__in=pulled),
+        ).annotate(feed_date=F('pub_date'), feed_post=F('pk'))
+    return Post.objects.annotate(entry=FilteredRelation(
+        'timeline_entries', condition=Q(timeline_entries__user=user),
+    )).filter(entry__user=user).annotate(
+        feed_date=F('entry__pub_date'), feed_post=F('entry__post_id'))
+
+
+def fill(after_post_id=0, after_follow_id=0):
+    """Раскладывает в ленты посты с id больше ``after_post_id`` и
+    подписки с id больше ``after_follow_id`` одним запросом - для
+    данных, загруженных в обход сигналов (см. ``posts.transfer``).
+    Авторов, у которых подписчиков больше ``TIMELINE_FANOUT_LIMIT``,
+    сначала переводит на pull."""
+    UserCounter.objects.filter(
+        followers_count__gt=settings.TIMELINE_FANOUT_LIMIT,
+    ).update(timeline_pulled=True)
+    return _insert(
+        '(p.id > %s OR f.id > %s) AND p.author_id NOT IN '
+        '(SELECT user_id FROM {counter} WHERE timeline_pulled)'.format(
+            counter=UserCounter._meta.db_table),
+        [after_post_id, after_follow_id])
@@ -0,0 +1,246 @@
+"""Выгрузка и загрузка данных в формате JSONL.
+
+Каждая строка - объект с полем ``model``: ``user``, ``group``, ``post``,
+``comment`` или ``follow``. Пользователи и группы ссылаются друг на
+друга по ``username`` и ``slug``, комментарии на посты - по id поста в
+выгрузке. Записи идут в этом порядке, поэтому и выгрузка, и загрузка
+держат в памяти только одну пачку.
+
+При загрузке id постов и комментариев сдвигаются на максимальный id в
+базе, так что ссылки переводятся без таблицы соответствия. Сигналы при
+``bulk_create`` не отправляются, поэтому счётчики, ленты подписок,
+поисковый индекс и кэш лент обновляются в конце загрузки.
+"""
+import json
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils.dateparse import parse_datetime
+
+from . import caching, counters, search, timeline
+from .models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+MODELS = ('user', 'group', 'post', 'comment', 'follow')
+
+
+class InvalidDump(Exception):
+    pass
+
+
+def _records(model, queryset, fields, batch_size):
+    for values in queryset.order_by('pk').values(*fields).iterator(
+            chunk_size=batch_size):
+        yield {'model': model, **values}
+
+
+def export_records(batch_size=1000):
+    """Все записи выгрузки по порядку, словарями."""
+    yield from _records(
+        'user', User.objects.all(),
+        ('username', 'first_name', 'last_name', 'email'), batch_size)
+    yield from _records(
+        'group', Group.objects.all(),
+        ('title', 'slug', 'description'), batch_size)
+    for record in _records(
+            'post', Post.objects.all(),
+            ('id', 'text', 'pub_date', 'author__username', 'group__slug',
+             'image'), batch_size):
+        record['author'] = record.pop('author__username')
+        record['group'] = record.pop('group__slug')
+        yield record
+    for record in _records(
+            'comment', Comment.objects.all(),
+            ('id', 'post_id', 'author__username', 'text', 'created'),
+            batch_size):
+        record['post'] = record.pop('post_id')
+        record['author'] = record.pop('author__username')
+        yield record
+    for record in _records(
+            'follow', Follow.objects.all(),
+            ('user__username', 'author__username'), batch_size):
+        record['user'] = record.pop('user__username')
+        record['author'] = record.pop('author__username')
+        yield record
+
+
+def export(stream, batch_size=1000):
+    """Пишет выгрузку в текстовый поток; возвращает число записей."""
+    total = 0
+    for record in export_records(batch_size):
+        for name in ('pub_date', 'created'):
+            if name in record:
+                record[name] = record[name].isoformat()
+        stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+        total += 1
+    return total
+
+
+@contextmanager
+def _keep_dates():
+    """Отключает ``auto_now_add``, чтобы сохранить даты из выгрузки."""
+    fields = [Post._meta.get_field('pub_date'),
+              Comment._meta.get_field('created')]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def _parse(lines):
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            raise InvalidDump(f'Строка {number}: {exc}') from exc
+        if record.get('model') not in MODELS:
+            raise InvalidDump(
+                f'Строка {number}: неизвестная модель '
+                f'{record.get("model")!r}')
+        yield record
+
+
+def _max_id(model):
+    return model.objects.aggregate(top=Max('id'))['top'] or 0
+
+
+class Importer:
+    def __init__(self, batch_size=1000):
+        self.batch_size = batch_size
+        self.post_offset = _max_id(Post)
+        self.comment_offset = _max_id(Comment)
+        self.follow_start = _max_id(Follow)
+        self.group_ids = {}
+        self.stats = dict.fromkeys(MODELS, 0)
+
+    def _user_ids(self, usernames, records=()):
+        """id пользователей по именам; недостающие создаются без
+        пароля."""
+        usernames = set(usernames)
+        ids = dict(User.objects.filter(username__in=usernames).values_list(
+            'username', 'id'))
+        details = {record['username']: record for record in records}
+        missing = []
+        for username in usernames - ids.keys():
+            record = details.get(username, {})
+            missing.append(User(
+                username=username,
+                first_name=record.get('first_name', ''),
+                last_name=record.get('last_name', ''),
+                email=record.get('email', ''),
+                password=make_password(None)))
+        if missing:
+            User.objects.bulk_create(missing)
+            self.stats['user'] += len(missing)
+            ids.update(User.objects.filter(
+                username__in=[user.username for user in missing],
+            ).values_list('username', 'id'))
+        return ids
+
+    def _group_ids(self, slugs):
+        unknown = set(slugs) - self.group_ids.keys() - {None}
+        if unknown:
+            self.group_ids.update(Group.objects.filter(
+                slug__in=unknown).values_list('slug', 'id'))
+        missing = unknown - self.group_ids.keys()
+        if missing:
+            raise InvalidDump(f'Нет групп: {", ".join(sorted(missing))}')
+        return self.group_ids
+
+    def _load_user(self, records):
+        self._user_ids((record['username'] for record in records), records)
+
+    def _load_group(self, records):
+        existing = set(Group.objects.filter(
+            slug__in=[record['slug'] for record in records],
+        ).values_list('slug', flat=True))
+        created = Group.objects.bulk_create(
+            Group(title=record['title'], slug=record['slug'],
+                  description=record['description'])
+            for record in records if record['slug'] not in existing)
+        self.stats['group'] += len(created)
+
+    def _load_post(self, records):
+        authors = self._user_ids(record['author'] for record in records)
+        groups = self._group_ids(record['group'] for record in records)
+        Post.objects.bulk_create(
+            Post(id=record['id'] + self.post_offset,
+                 text=record['text'],
+                 pub_date=parse_datetime(record['pub_date']),
+                 author_id=authors[record['author']],
+                 group_id=groups.get(record['group']),
+                 image=record['image'])
+            for record in records)
+        self.stats['post'] += len(records)
+
+    def _load_comment(self, records):
+        authors = self._user_ids(record['author'] for record in records)
+        Comment.objects.bulk_create(
+            Comment(id=record['id'] + self.comment_offset,
+                    post_id=record['post'] + self.post_offset,
+                    author_id=authors[record['author']],
+                    text=record['text'],
+                    created=parse_datetime(record['created']))
+            for record in records)
+        self.stats['comment'] += len(records)
+
+    def _load_follow(self, records):
+        users = self._user_ids(
+            name for record in records
+            for name in (record['user'], record['author']))
+        Follow.objects.bulk_create(
+            (Follow(user_id=users[record['user']],
+                    author_id=users[record['author']])
+             for record in records),
+            ignore_conflicts=True)
+        self.stats['follow'] += len(records)
+
+    def _flush(self, model, records):
+        if records:
+            with transaction.atomic():
+                getattr(self, f'_load_{model}')(records)
+
+    def load(self, lines):
+        """Загружает записи из итератора строк JSONL."""
+        return self.load_records(_parse(lines))
+
+    def load_records(self, records):
+        """Загружает записи-словари в порядке ``MODELS``."""
+        model, batch = None, []
+        with _keep_dates():
+            for record in records:
+                if record['model'] != model or len(batch) >= self.batch_size:
+                    self._flush(model, batch)
+                    model, batch = record['model'], []
+                batch.append(record)
+            self._flush(model, batch)
+        self.finish()
+        return self.stats
+
+    def finish(self):
+        """Обновляет всё, что обычно поддерживают сигналы."""
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                    no_style(), [Post, Comment]):
+                cursor.execute(sql)
+        counters.rebuild()
+        timeline.fill(self.post_offset, self.follow_start)
+        if search.available():
+            search.rebuild()
+        caching.bump('index')
+        for group_id in Group.objects.values_list('id', flat=True):
+            caching.bump(f'group:{group_id}')
+        authors = Post.objects.filter(id__gt=self.post_offset).values_list(
+            'author_id', flat=True).distinct().order_by()
+        for author_id in authors.iterator():
+            caching.bump(f'author:{author_id}')
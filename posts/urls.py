@@ -6,9 +6,12 @@ urlpatterns = [
     path('follow/', views.follow_index, name='follow_index'),
     path('<str:username>/<int:post_id>/comment/', views.add_comment,
          name='add_comment'),
+    path('<str:username>/<int:post_id>/comments/', views.post_comments,
+         name='post_comments'),
     path('500/', views.server_error, name='500'),
     path('404/', views.page_not_found, name='404'),
     path('', views.index, name='index'),
+    path('search/', views.search_posts, name='search'),
     path('group/<slug:slug>/', views.group_posts, name='group'),
     path('new/', views.post_new, name='post_new'),
     path('<str:username>/', views.profile, name='profile'),
@@ -1,78 +1,150 @@
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
-from django.core.paginator import Paginator
+from django.db import transaction
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from yatube import settings
+from django.urls import reverse
+from django.utils.http import urlencode
+from django.views.decorators.http import condition, require_safe
 
+from . import (caching, conditional, counters, feeds, images, search,
+               streaming, timeline)
 from .forms import CommentForm, PostForm
-from .models import Group, Post, Comment, Follow
+from .models import Group, Post, Follow
+from .paginator import CursorPaginator, paginate
 
 
 def index(request):
-    post_list = Post.objects.all().order_by('-pub_date')
-    paginator = Paginator(post_list, settings.PAR_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    page = caching.cached_page(request, 'index', feeds.index_feed())
+    if settings.STREAMING_RENDER:
+        return streaming.render(request, 'index.html', {'page': page},
+                                page, 'includes/post_list.html', 'posts')
     return render(request, 'index.html',
                   {'page': page})
 
 
+@condition(etag_func=conditional.group_etag,
+           last_modified_func=conditional.group_last_modified)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    group_list = Post.objects.filter(group=group).order_by('-pub_date')
-    paginator = Paginator(group_list, settings.PAR_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    page = caching.cached_page(request, f'group:{group.id}',
+                               feeds.group_feed(group))
     return render(request, 'group.html',
                   {'group': group, 'page': page})
 
 
+def search_posts(request):
+    query = request.GET.get('q', '').strip()
+    hits, next_cursor = search.search(
+        query, request.GET.get('cursor'), settings.PAR_PAGE)
+    return render(request, 'search.html',
+                  {'query': query, 'hits': hits, 'next_cursor': next_cursor})
+
+
 @login_required
 def post_new(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
     if form.is_valid():
         post_new = form.save(commit=False)
         post_new.author = request.user
-        post_new.save()
+        with transaction.atomic():
+            post_new.save()
+            images.schedule(post_new)
         return redirect('index')
     return render(request, 'new.html', {'form': form})
 
 
+@condition(etag_func=conditional.profile_etag,
+           last_modified_func=conditional.profile_last_modified)
 def profile(request, username):
     post = get_object_or_404(User, username=username)
-    user_posts = Post.objects.filter(author=post).order_by('-pub_date')
-    number_of_posts = user_posts.count()
-    paginator = Paginator(user_posts, settings.PAR_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    author_counters = counters.for_user(post)
+    page = caching.cached_page(request, f'author:{post.id}',
+                               feeds.author_feed(post))
     following = request.user.is_authenticated and Follow.objects.filter(
         user=request.user, author=post).exists()
     return render(request, 'profile.html',
                   {'author': post,
                    'post': post,
                    'page': page,
-                   'number_of_posts': number_of_posts,
+                   'counters': author_counters,
+                   'number_of_posts': author_counters.posts_count,
                    'following': following})
 
 
+@condition(etag_func=conditional.post_etag,
+           last_modified_func=conditional.post_last_modified)
 def post_view(request, username: str, post_id: int):
     """Возвращает страницу просмотра конкретного поста"""
-    post = get_object_or_404(Post, id=post_id)
-    number_of_posts = Post.objects.filter(
-        author=post.author).select_related('author').count()
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group'), id=post_id)
+    author_counters = counters.for_user(post.author)
     form = CommentForm(request.POST or None)
-    comments = Comment.objects.filter(post__id=post_id)
+    # Первая порция комментариев; следующие подгружает post_comments
+    comments = feeds.comments_feed(post_id)[:settings.COMMENTS_PER_PAGE]
+    loaded = list(comments)
+    more_comments_url = None
+    if loaded and post.comment_count > len(loaded):
+        more_comments_url = _more_comments_url(post, loaded[-1])
     context = {
         'author': post.author,
         'post': post,
-        'number_of_posts': number_of_posts,
+        'counters': author_counters,
+        'number_of_posts': author_counters.posts_count,
         'form': form,
         'comments': comments,
+        'more_comments_url': more_comments_url,
         'post_id': post_id
     }
+    if settings.STREAMING_RENDER:
+        return streaming.render(
+            request, 'post.html', context, loaded,
+            'includes/comment_list.html', 'comments',
+            {'more_comments_url': more_comments_url})
     return render(request, 'post.html', context)
 
 
+def _comment_paginator(post_id):
+    return CursorPaginator(feeds.comments_feed(post_id),
+                           settings.COMMENTS_PER_PAGE,
+                           ordering=feeds.COMMENT_ORDERING)
+
+
+def _more_comments_url(post, last):
+    cursor = _comment_paginator(post.id).encode_cursor(last, 'next')
+    url = reverse('post_comments', args=[post.author.username, post.id])
+    return url + '?' + urlencode({'cursor': cursor})
+
+
+@require_safe
+@condition(etag_func=conditional.post_etag,
+           last_modified_func=conditional.post_last_modified)
+def post_comments(request, username, post_id):
+    """Следующая порция комментариев для кнопки "Показать ещё":
+    HTML-фрагмент или JSON при ``?format=json``."""
+    post = get_object_or_404(
+        Post.objects.select_related('author'),
+        id=post_id, author__username=username)
+    comments = _comment_paginator(post_id).get_page(
+        request.GET.get('cursor'))
+    more_url = None
+    if comments.has_next():
+        more_url = _more_comments_url(post, comments[-1])
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'comments': [{
+                'id': comment.id,
+                'author': comment.author.username,
+                'text': comment.text,
+                'created': comment.created.isoformat(),
+            } for comment in comments],
+            'next': more_url and more_url + '&format=json',
+        })
+    return render(request, 'includes/comment_list.html',
+                  {'comments': comments, 'more_comments_url': more_url})
+
+
 @login_required
 def post_edit(request, username, post_id):
     profile = get_object_or_404(User, username=username)
@@ -84,7 +156,10 @@ def post_edit(request, username, post_id):
 
     if request.method == 'POST':
         if form.is_valid():
-            form.save()
+            with transaction.atomic():
+                post = form.save()
+                if 'image' in form.changed_data:
+                    images.schedule(post)
             return redirect('post', username=request.user.username,
                             post_id=post_id)
 
@@ -113,7 +188,8 @@ def add_comment(request, username, post_id):
             comment = form.save(commit=False)
             comment.author = request.user
             comment.post = post
-            comment.save()
+            with transaction.atomic():
+                comment.save()
             return redirect('post', username, post_id)
     return render(request, 'includes/comments.html',
                   {'form': form, 'post': post})
@@ -121,13 +197,13 @@ def add_comment(request, username, post_id):
 
 @login_required
 def follow_index(request):
-    posts = Post.objects.filter(
-        author__following__user=request.user).order_by('-pub_date')
-    paginator = Paginator(posts, settings.PAR_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    posts = feeds.follow_feed(request.user)
+    page = paginate(request, posts, lookups=timeline.FEED_ORDERING)
     context = {'page': page,
-               'paginator': paginator}
+               'paginator': page.paginator}
+    if settings.STREAMING_RENDER:
+        return streaming.render(request, 'follow.html', context, page,
+                                'includes/post_list.html', 'posts')
     return render(request, 'follow.html', context)
 
 
@@ -135,8 +211,11 @@ def follow_index(request):
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if request.user != author:
-        Follow.objects.get_or_create(
-            user_id=request.user.id, author_id=author.id)
+        with transaction.atomic():
+            _, created = Follow.objects.get_or_create(
+                user_id=request.user.id, author_id=author.id)
+            if created:
+                timeline.backfill(request.user, author)
     return redirect('profile', username)
 
 
@@ -144,6 +223,8 @@ def profile_follow(request, username):
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     if author != request.user:
-        Follow.objects.filter(
-            user_id=request.user, author_id=author).delete()
+        with transaction.atomic():
+            Follow.objects.filter(
+                user_id=request.user, author_id=author).delete()
+            timeline.trim(request.user, author)
     return redirect('profile', username)
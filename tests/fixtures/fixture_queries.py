@@ -0,0 +1,9 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def fail_on_repeated_queries(settings):
+    """Страница, выполнившая один и тот же по форме SQL-запрос
+    QUERY_INSPECTOR_DUPLICATES раз (N+1), роняет тест с указанием
+    строки шаблона и кода, откуда пришли запросы."""
+    settings.QUERY_INSPECTOR = 'raise'
@@ -0,0 +1,23 @@
+"""
+ASGI config for yatube project.
+
+It exposes the ASGI callable as a module-level variable named
+``application``. Django 2.2 has no ASGI support of its own: requests are
+passed to the WSGI handler in a bounded thread pool, see
+``yatube.asgi_handler``.
+"""
+
+import os
+
+from django.core.wsgi import get_wsgi_application
+
+from yatube.asgi_handler import AsgiHandler
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+application = AsgiHandler(get_wsgi_application())
+
+# Шаблоны компилируются до первого запроса (см. TEMPLATE_CACHE)
+from yatube.template_warmup import warm_up  # noqa: E402
+
+warm_up()
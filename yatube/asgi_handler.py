@@ -0,0 +1,159 @@
+"""ASGI поверх WSGI-обработчика Django.
+
+В Django 2.2 нет ни ASGI, ни async-view, поэтому ``AsgiHandler`` - мост:
+HTTP-запрос ASGI превращается в WSGI environ, а обычный обработчик
+Django выполняется в пуле из ``settings.ASGI_THREADS`` потоков. Чтение
+тела запроса и отправка ответа медленному клиенту ждут в цикле событий
+и поток не занимают: один процесс держит много соединений, а с базой и
+картинками одновременно работают не больше ``ASGI_THREADS`` потоков.
+"""
+import asyncio
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+
+def build_environ(scope, body):
+    """WSGI environ для HTTP-запроса ASGI ``scope`` с телом ``body``."""
+    # raw_path ещё в %-кодировке, а WSGI ждёт раскодированный путь
+    path = scope['path']
+    root = scope.get('root_path', '')
+    if root and path.startswith(root):
+        path = path[len(root):]
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        # WSGI передаёт байты пути строкой latin-1
+        'SCRIPT_NAME': root.encode().decode('latin-1'),
+        'PATH_INFO': path.encode().decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': 'HTTP/' + scope.get('http_version', '1.1'),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+    for name, value in scope.get('headers', ()):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = 'HTTP_' + name
+        if name in environ:
+            # HTTP/2 присылает каждую cookie отдельным заголовком, а
+            # разделитель cookie - "; ", не запятая
+            separator = '; ' if name == 'HTTP_COOKIE' else ','
+            value = environ[name] + separator + value
+        environ[name] = value
+    return environ
+
+
+class AsgiHandler:
+    def __init__(self, wsgi_application, threads=None):
+        self.wsgi_application = wsgi_application
+        self.threads = threads
+        self._executor = None
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.threads or settings.ASGI_THREADS,
+                thread_name_prefix='asgi')
+        return self._executor
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self.http(scope, receive, send)
+        else:
+            raise ValueError(f'Неподдерживаемый тип ASGI: {scope["type"]}')
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self._executor is not None:
+                    self._executor.shutdown(wait=True)
+                    self._executor = None
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def read_body(self, receive):
+        """Тело запроса; ``None``, если клиент отключился. Большие тела
+        (загрузка картинок) уходят во временный файл."""
+        body = tempfile.SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                body.close()
+                return None
+            body.write(message.get('body', b''))
+            if not message.get('more_body'):
+                body.seek(0)
+                return body
+
+    def run(self, environ, loop, queue):
+        """Выполняет запрос целиком в одном потоке пула: view, итерацию
+        по ответу и ``close()``, который шлёт ``request_finished`` и
+        закрывает соединения этого же потока. Сообщения ASGI уходят в
+        ``queue`` без ожидания клиента, поток медленным клиентом не
+        занимается."""
+        def put(message):
+            loop.call_soon_threadsafe(queue.put_nowait, message)
+
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [
+                (name.lower().encode('latin-1'), value.encode('latin-1'))
+                for name, value in headers]
+
+        try:
+            result = self.wsgi_application(environ, start_response)
+            try:
+                put({'type': 'http.response.start', **response})
+                # Потоковые ответы рендерятся при итерации
+                for chunk in result:
+                    if chunk:
+                        put({'type': 'http.response.body', 'body': chunk,
+                             'more_body': True})
+            finally:
+                if hasattr(result, 'close'):
+                    result.close()
+        finally:
+            put(None)
+
+    async def http(self, scope, receive, send):
+        body = await self.read_body(receive)
+        if body is None:
+            return
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        try:
+            job = loop.run_in_executor(
+                self.executor, self.run, build_environ(scope, body),
+                loop, queue)
+            while True:
+                message = await queue.get()
+                if message is None:
+                    break
+                await send(message)
+            # Исключение из view поднимется здесь
+            await job
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            body.close()
@@ -0,0 +1,84 @@
+"""Чтение с реплик, запись в основную базу.
+
+Реплики перечислены в ``settings.DATABASE_REPLICAS``. Чтения уходят на
+реплику только внутри HTTP-запроса, который обслуживает
+``PrimaryPinMiddleware``: она выбирается случайно один раз на запрос, и
+все его чтения видят один и тот же снимок данных. Команды, фоновые
+потоки и открытые транзакции основной базы читают из неё же.
+
+Чтобы пользователь сразу видел свой пост или комментарий, запрос,
+который что-то записал, ставит cookie на
+``settings.READ_YOUR_WRITES_SECONDS`` секунд: пока она жива, все
+чтения этого клиента идут в основную базу.
+"""
+import random
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE = 'primary_pin'
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+_state = threading.local()
+
+
+def reads_from_primary():
+    return (not getattr(_state, 'replica', None)
+            or getattr(_state, 'pinned', False)
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block)
+
+
+def reads_from_replica():
+    return bool(settings.DATABASE_REPLICAS) and not reads_from_primary()
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if settings.DATABASE_REPLICAS and not reads_from_primary():
+            return _state.replica
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики - копии основной базы, связи между ними допустимы
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class _WriteDetector:
+    def __call__(self, execute, sql, params, many, context):
+        if sql.lstrip()[:7].upper().startswith(WRITE_STATEMENTS):
+            _state.pinned = _state.wrote = True
+        return execute(sql, params, many, context)
+
+
+class PrimaryPinMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        _state.replica = random.choice(settings.DATABASE_REPLICAS)
+        # Небезопасные методы пишут: и читать им нужно свежие данные
+        _state.pinned = (PIN_COOKIE in request.COOKIES
+                         or request.method not in ('GET', 'HEAD'))
+        _state.wrote = False
+        try:
+            primary = connections[DEFAULT_DB_ALIAS]
+            with primary.execute_wrapper(_WriteDetector()):
+                response = self.get_response(request)
+        finally:
+            wrote = _state.wrote
+            _state.replica = None
+            _state.pinned = _state.wrote = False
+        if wrote:
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=settings.READ_YOUR_WRITES_SECONDS,
+                httponly=True, samesite='Lax')
+        return response
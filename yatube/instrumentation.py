@@ -0,0 +1,237 @@
+"""Замеры запросов без DEBUG.
+
+``InstrumentationMiddleware`` для доли запросов
+``settings.INSTRUMENTATION_SAMPLE_RATE`` считает число SQL-запросов и
+их время, время рендера шаблонов, размер ответа и общее время.
+Результат уходит в заголовок ``Server-Timing``, в лог
+``yatube.instrumentation`` и в гистограммы по имени URL, которые
+показывает команда ``request_stats``. Гистограммы копятся в памяти
+процесса и сбрасываются в кэш не чаще раза в
+``settings.INSTRUMENTATION_FLUSH_SECONDS``, как счётчики кэша лент в
+``posts.caching``.
+"""
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.template.backends import django as django_backend
+from django.urls import URLPattern, URLResolver, get_resolver
+
+logger = logging.getLogger(__name__)
+
+# Верхние границы корзин гистограмм; последняя корзина - всё, что больше
+BUCKETS = {
+    'time': (5, 10, 25, 50, 100, 250, 500, 1000, 2500),
+    'queries': (1, 2, 5, 10, 20, 50, 100, 500),
+}
+METRICS = ('time', 'sql', 'queries', 'template', 'bytes')
+
+_local = threading.local()
+
+
+def _render(render):
+    def timed_render(self, context=None, request=None):
+        depth = getattr(_local, 'depth', None)
+        if depth is None:
+            return render(self, context, request)
+        # Вложенный render_to_string уже учтён во внешнем рендере
+        _local.depth = depth + 1
+        started = time.perf_counter()
+        try:
+            return render(self, context, request)
+        finally:
+            _local.depth = depth
+            if depth == 0:
+                _local.template += time.perf_counter() - started
+    timed_render.instrumented = True
+    return timed_render
+
+
+def _install_template_timer():
+    template = django_backend.Template
+    if not getattr(template.render, 'instrumented', False):
+        template.render = _render(template.render)
+
+
+class _QueryTimer:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+
+
+def _key(view, metric, suffix):
+    return f'instrumentation:{view}:{metric}:{suffix}'
+
+
+def _incr(key, delta):
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        if not cache.add(key, delta, None):
+            cache.incr(key, delta)
+
+
+def _bucket(metric, value):
+    for bound in BUCKETS[metric]:
+        if value <= bound:
+            return bound
+    return 'inf'
+
+
+_pending = Counter()
+_pending_lock = threading.Lock()
+_flushed_at = time.monotonic()
+
+
+def flush():
+    """Переносит замеры этого процесса в кэш."""
+    global _flushed_at
+    with _pending_lock:
+        deltas = dict(_pending)
+        _pending.clear()
+        _flushed_at = time.monotonic()
+    for key, delta in deltas.items():
+        _incr(key, delta)
+
+
+def record(view, sample):
+    """Добавляет замер ``sample`` (значения ``METRICS``) к статистике
+    ``view``. Время хранится в микросекундах, чтобы суммы были целыми."""
+    deltas = Counter({_key(view, 'count', 'total'): 1})
+    for metric in METRICS:
+        value = sample[metric]
+        scale = 1 if metric in ('queries', 'bytes') else 1000
+        deltas[_key(view, metric, 'sum')] += int(value * scale)
+        if metric in BUCKETS:
+            deltas[_key(view, metric, _bucket(metric, value))] += 1
+    with _pending_lock:
+        _pending.update(deltas)
+        due = (time.monotonic() - _flushed_at
+               >= settings.INSTRUMENTATION_FLUSH_SECONDS)
+    if due:
+        flush()
+
+
+def _keys(view):
+    keys = [_key(view, 'count', 'total')]
+    keys += [_key(view, metric, 'sum') for metric in METRICS]
+    keys += [_key(view, metric, bound) for metric, bounds in BUCKETS.items()
+             for bound in (*bounds, 'inf')]
+    return keys
+
+
+def view_names(resolver=None, namespaces=()):
+    """Имена всех view так, как их даёт ``ResolverMatch.view_name``."""
+    resolver = resolver or get_resolver()
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            inner = namespaces
+            if pattern.namespace:
+                inner = (*namespaces, pattern.namespace)
+            yield from view_names(pattern, inner)
+        elif isinstance(pattern, URLPattern):
+            name = pattern.name or pattern.lookup_str
+            yield ':'.join((*namespaces, name))
+
+
+def _views():
+    return set(view_names()) | {'unresolved'}
+
+
+def percentile(histogram, count, share):
+    """Верхняя граница корзины, в которую попадает доля ``share``."""
+    seen = 0
+    for bound, hits in histogram:
+        seen += hits
+        if seen >= share * count:
+            return bound
+    return None
+
+
+def stats():
+    """Статистика по view, у которых есть замеры."""
+    flush()
+    result = {}
+    for view in sorted(_views()):
+        values = cache.get_many(_keys(view))
+        count = values.get(_key(view, 'count', 'total'), 0)
+        if not count:
+            continue
+        row = {'count': count}
+        for metric in METRICS:
+            total = values.get(_key(view, metric, 'sum'), 0)
+            scale = 1 if metric in ('queries', 'bytes') else 1000
+            row[metric] = round(total / scale / count, 2)
+        for metric, bounds in BUCKETS.items():
+            histogram = [(bound, values.get(_key(view, metric, bound), 0))
+                         for bound in (*bounds, 'inf')]
+            row[f'{metric}_histogram'] = dict(histogram)
+            row[f'{metric}_p50'] = percentile(histogram, count, 0.5)
+            row[f'{metric}_p95'] = percentile(histogram, count, 0.95)
+        result[view] = row
+    return result
+
+
+def reset():
+    with _pending_lock:
+        _pending.clear()
+    cache.delete_many([key for view in _views()
+                       for key in _keys(view)])
+
+
+class InstrumentationMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        _install_template_timer()
+
+    def __call__(self, request):
+        rate = settings.INSTRUMENTATION_SAMPLE_RATE
+        if not rate or random.random() >= rate:
+            return self.get_response(request)
+
+        timer = _QueryTimer()
+        _local.depth, _local.template = 0, 0.0
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timer))
+                response = self.get_response(request)
+        finally:
+            template = _local.template
+            _local.depth = None
+        elapsed = time.perf_counter() - started
+
+        sample = {
+            'time': elapsed * 1000,
+            'sql': timer.duration * 1000,
+            'queries': timer.count,
+            'template': template * 1000,
+            'bytes': 0 if response.streaming else len(response.content),
+        }
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        response['Server-Timing'] = (
+            f'db;dur={sample["sql"]:.1f};desc="{timer.count} queries", '
+            f'tpl;dur={sample["template"]:.1f}, '
+            f'total;dur={sample["time"]:.1f}')
+        logger.info('%s %s: запросов %d, SQL %.1f мс, шаблоны %.1f мс, '
+                    '%d байт, всего %.1f мс', request.method, view,
+                    timer.count, sample['sql'], sample['template'],
+                    sample['bytes'], sample['time'])
+        record(view, sample)
+        return response
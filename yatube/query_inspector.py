@@ -0,0 +1,123 @@
+"""Поиск медленных и повторяющихся SQL-запросов.
+
+Включается настройкой ``QUERY_INSPECTOR``: ``'log'`` - предупреждения в
+лог ``yatube.query_inspector``, ``'raise'`` - вдобавок исключение
+``DuplicateQueries`` (для тестов). В пределах одного HTTP-запроса
+отмечаются запросы дольше ``QUERY_INSPECTOR_SLOW_MS`` и одинаковые по
+форме запросы, повторённые ``QUERY_INSPECTOR_DUPLICATES`` раз и больше -
+типичный N+1. Для каждого указывается строка шаблона и место в коде
+проекта, откуда пришёл запрос.
+"""
+import logging
+import os
+import re
+import sys
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Списки параметров разной длины в IN (...) - это одна и та же форма
+_PLACEHOLDERS = re.compile(r'\(\s*%s(\s*,\s*%s)*\s*\)')
+
+
+class DuplicateQueries(Exception):
+    pass
+
+
+def shape(sql):
+    return _PLACEHOLDERS.sub('(...)', sql)
+
+
+def _project_frame(frame):
+    filename = frame.f_code.co_filename
+    return (filename.startswith(settings.BASE_DIR)
+            and 'site-packages' not in filename
+            and filename != __file__)
+
+
+def origin():
+    """Строка шаблона и место в коде проекта, откуда выполняется запрос."""
+    template = code = None
+    frame = sys._getframe(1)
+    while frame is not None and (template is None or code is None):
+        node = frame.f_locals.get('self')
+        if (template is None and frame.f_code.co_name == 'render_annotated'
+                and getattr(node, 'origin', None) is not None
+                and getattr(node, 'token', None) is not None):
+            name = node.origin.template_name or node.origin.name
+            template = f'{name}:{node.token.lineno}'
+        elif code is None and _project_frame(frame):
+            path = os.path.relpath(frame.f_code.co_filename,
+                                   settings.BASE_DIR)
+            code = f'{path}:{frame.f_lineno} ({frame.f_code.co_name})'
+        frame = frame.f_back
+    return ', '.join(filter(None, (template, code))) or 'неизвестно'
+
+
+class QueryInspector:
+    """Обёртка ``execute`` одного HTTP-запроса (или блока кода)."""
+
+    def __init__(self, slow_ms=None, duplicates=None):
+        self.slow_ms = (settings.QUERY_INSPECTOR_SLOW_MS
+                        if slow_ms is None else slow_ms)
+        self.duplicates = (settings.QUERY_INSPECTOR_DUPLICATES
+                           if duplicates is None else duplicates)
+        self.counts = {}
+        self.slow = []
+        self.repeated = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - started) * 1000
+            key = shape(sql)
+            count = self.counts[key] = self.counts.get(key, 0) + 1
+            if count == self.duplicates:
+                self.repeated[key] = origin()
+            if duration > self.slow_ms:
+                self.slow.append((sql, duration, origin()))
+
+    def report(self, label):
+        for sql, duration, where in self.slow:
+            logger.warning('%s: медленный запрос %.1f мс (%s): %s',
+                           label, duration, where, sql)
+        for sql, where in self.repeated.items():
+            logger.warning('%s: запрос повторён %d раз (%s): %s',
+                           label, self.counts[sql], where, sql)
+
+    def problems(self):
+        return [f'{self.counts[sql]} x {sql}\n    {where}'
+                for sql, where in self.repeated.items()]
+
+
+@contextmanager
+def inspect_queries(**options):
+    inspector = QueryInspector(**options)
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(inspector))
+        yield inspector
+
+
+class QueryInspectorMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = settings.QUERY_INSPECTOR
+        if not mode:
+            return self.get_response(request)
+        with inspect_queries() as inspector:
+            response = self.get_response(request)
+        inspector.report(f'{request.method} {request.path}')
+        if mode == 'raise' and inspector.repeated:
+            raise DuplicateQueries(
+                f'{request.method} {request.path}: повторяющиеся запросы\n'
+                + '\n'.join(inspector.problems()))
+        return response
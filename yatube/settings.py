@@ -48,6 +48,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yatube.instrumentation.InstrumentationMiddleware',
+    'yatube.query_inspector.QueryInspectorMiddleware',
+    'yatube.db_router.PrimaryPinMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -60,18 +63,32 @@ MIDDLEWARE = [
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
+
+# Скомпилированные шаблоны хранятся в памяти процесса и не
+# перечитываются с диска; YATUBE_TEMPLATE_CACHE=0 - для правки шаблонов
+# без перезапуска сервера
+TEMPLATE_CACHE = os.environ.get('YATUBE_TEMPLATE_CACHE', '1') == '1'
+TEMPLATE_LOADERS = [
+    "django.template.loaders.filesystem.Loader",
+    "django.template.loaders.app_directories.Loader",
+]
+if TEMPLATE_CACHE:
+    TEMPLATE_LOADERS = [
+        ("django.template.loaders.cached.Loader", TEMPLATE_LOADERS),
+    ]
+
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
         "DIRS": [TEMPLATES_DIR],
-        "APP_DIRS": True,
         "OPTIONS": {
             "context_processors": [
                 "django.template.context_processors.debug",
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
-            ]
+            ],
+            "loaders": TEMPLATE_LOADERS,
         },
     }
 ]
@@ -84,11 +101,46 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'yatube.sqlite_backend',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Соединение живёт между запросами, а не открывается заново
+        'CONN_MAX_AGE': int(os.environ.get('YATUBE_DB_CONN_MAX_AGE', 600)),
+        'OPTIONS': {
+            # Сколько секунд ждать освобождения блокировки на запись
+            'timeout': int(os.environ.get('YATUBE_DB_TIMEOUT', 20)),
+            'transaction_mode': 'IMMEDIATE',
+            'pragmas': {
+                'journal_mode': 'WAL',
+                'synchronous': 'NORMAL',
+                # Отрицательное значение - размер в КиБ
+                'cache_size': -int(
+                    os.environ.get('YATUBE_DB_CACHE_KB', 64 * 1024)),
+                'mmap_size': int(
+                    os.environ.get('YATUBE_DB_MMAP_BYTES', 256 * 1024 ** 2)),
+                'temp_store': 'MEMORY',
+            },
+        },
     }
 }
 
+# Реплики только для чтения: YATUBE_DB_REPLICAS=/path/r1.sqlite3,...
+# Для локальной проверки файлы реплик заполняет команда sync_replicas
+DATABASE_REPLICAS = []
+for number, path in enumerate(filter(
+        None, os.environ.get('YATUBE_DB_REPLICAS', '').split(','))):
+    alias = f'replica{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME': path,
+        # В тестах реплики - это та же тестовая база
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['yatube.db_router.PrimaryReplicaRouter']
+
+# Сколько секунд после записи клиент читает из основной базы
+READ_YOUR_WRITES_SECONDS = 10
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -139,8 +191,93 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 
 PAR_PAGE = 10
 
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+# Режим пагинации лент: 'offset' (?page=) или 'cursor' (?cursor=, без
+# COUNT(*) и OFFSET - глубокие страницы стоят столько же, сколько первая)
+FEED_PAGINATION = os.environ.get('YATUBE_FEED_PAGINATION', 'offset')
+
+# Комментариев на странице поста и в одной порции "Показать ещё"
+COMMENTS_PER_PAGE = 50
+
+# Потоковая отдача лент и страницы поста (см. posts.streaming): шапка
+# страницы уходит до выборки и рендера карточек; остальные запросы
+# страницы (пагинация, автор, комментарии) по-прежнему идут до ответа
+STREAMING_RENDER = os.environ.get('YATUBE_STREAMING_RENDER', '0') == '1'
+STREAMING_CHUNK_SIZE = 5
+
+# Посты авторов, у которых подписчиков больше этого числа, не
+# раскладываются по лентам подписок, а подмешиваются при их чтении
+TIMELINE_FANOUT_LIMIT = 1000
+
+# Превью картинок постов: имя -> (геометрия, параметры sorl-thumbnail).
+# Создаются фоновой задачей после сохранения поста
+POST_THUMBNAILS = {
+    'card': ('960x339', {'crop': 'center', 'upscale': True}),
 }
+
+# Загруженные картинки постов (posts.images): предел большей стороны,
+# качество JPEG/WebP и размер, до которого загрузка обрабатывается сразу,
+# а не фоновой задачей
+POST_IMAGE_MAX_SIDE = 2048
+POST_IMAGE_QUALITY = 82
+POST_IMAGE_INLINE_BYTES = 2 * 1024 * 1024
+# Большие загрузки ждут обработки здесь: каталог не раздаётся, чтобы
+# оригинал с EXIF не был виден до обработки
+POST_IMAGE_STAGING_ROOT = os.path.join(BASE_DIR, 'uploads')
+
+# Фоновая очередь задач (posts.tasks, команда run_tasks): сколько задач
+# воркер забирает за раз, на сколько секунд, сколько попыток даёт
+# задаче и пауза перед первым повтором (дальше она удваивается)
+TASK_BATCH_SIZE = 100
+TASK_LEASE_SECONDS = 300
+TASK_MAX_ATTEMPTS = 5
+TASK_RETRY_DELAY = 10
+
+# Писем подписчикам за одно соединение с почтовым сервером
+NOTIFICATION_BATCH_SIZE = 100
+
+# Потоков, в которых yatube.asgi выполняет запросы; соединений с
+# клиентами может быть сколько угодно больше
+ASGI_THREADS = int(os.environ.get('YATUBE_ASGI_THREADS', 8))
+
+# Страницы лент сбрасываются сменой версии, поэтому могут жить долго
+FEED_CACHE_TIMEOUT = 60 * 60 * 24
+# Как часто процесс сбрасывает в кэш счётчики попаданий в кэш лент, с
+FEED_STATS_FLUSH_SECONDS = 30
+
+# Доля запросов, для которых замеряются SQL, шаблоны и размер ответа
+# (заголовок Server-Timing, лог yatube.instrumentation, команда
+# request_stats); 0 - замеры выключены
+INSTRUMENTATION_SAMPLE_RATE = float(
+    os.environ.get('YATUBE_INSTRUMENTATION_SAMPLE_RATE', 0))
+# Как часто процесс сбрасывает замеры в кэш, с; request_stats из другого
+# процесса видит их только с общим кэшем (YATUBE_CACHE=sqlite)
+INSTRUMENTATION_FLUSH_SECONDS = 30
+
+# Поиск медленных и повторяющихся (N+1) SQL-запросов: '' - выключен,
+# 'log' - предупреждения в лог yatube.query_inspector, 'raise' - ещё и
+# исключение на повторах (включается фикстурой в тестах)
+QUERY_INSPECTOR = os.environ.get('YATUBE_QUERY_INSPECTOR', '')
+QUERY_INSPECTOR_SLOW_MS = 100
+QUERY_INSPECTOR_DUPLICATES = 5
+
+# YATUBE_CACHE=sqlite включает кэш в файле SQLite, общий для всех
+# воркеров на машине; по умолчанию у каждого процесса свой кэш в памяти
+if os.environ.get('YATUBE_CACHE') == 'sqlite':
+    CACHES = {
+        'default': {
+            'BACKEND': 'yatube.sqlite_cache.SQLiteCache',
+            'LOCATION': os.environ.get(
+                'YATUBE_CACHE_LOCATION',
+                os.path.join(BASE_DIR, 'cache.sqlite3')),
+            'OPTIONS': {
+                'MAX_ENTRIES': int(
+                    os.environ.get('YATUBE_CACHE_MAX_ENTRIES', 50000)),
+            },
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
@@ -0,0 +1,45 @@
+"""SQLite с настройками для работы под нагрузкой.
+
+Подключение: ``ENGINE = 'yatube.sqlite_backend'``. Дополнительные ключи
+``OPTIONS``:
+
+* ``pragmas`` - словарь PRAGMA, выполняемых при открытии соединения
+  (например, ``journal_mode=WAL``: писатели не блокируют читателей);
+* ``transaction_mode`` - ``'DEFERRED'`` (как в Django), ``'IMMEDIATE'``
+  или ``'EXCLUSIVE'``. С ``IMMEDIATE`` транзакция сразу берёт блокировку
+  на запись и при занятой базе ждёт ``timeout`` секунд, а не падает с
+  ``database is locked`` при попытке записи после чтения.
+
+Остальные ключи, как обычно, передаются в ``sqlite3.connect``.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        options = self.settings_dict['OPTIONS']
+        self.pragmas = options.get('pragmas', {})
+        self.transaction_mode = options.get(
+            'transaction_mode', 'DEFERRED').upper()
+        if self.transaction_mode not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                f'transaction_mode должен быть одним из {TRANSACTION_MODES}')
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pragmas', None)
+        params.pop('transaction_mode', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(f'BEGIN {self.transaction_mode}')
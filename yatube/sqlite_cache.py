@@ -0,0 +1,173 @@
+"""Кэш в файле SQLite, общий для всех процессов на одной машине.
+
+Подключение: ``BACKEND = 'yatube.sqlite_cache.SQLiteCache'``,
+``LOCATION`` - путь к файлу. Размер ограничивается ``MAX_ENTRIES``:
+при переполнении удаляются давно не читанные записи (см.
+``CULL_FREQUENCY``). Истёкшие записи удаляются и размер проверяется раз
+в ``CULL_EVERY`` записей процесса (по умолчанию 100), поэтому таблица
+может ненадолго превысить ``MAX_ENTRIES``. ``incr``/``decr`` атомарны
+между процессами.
+"""
+import itertools
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+# Время последнего чтения обновляется не чаще раза в столько секунд,
+# чтобы чтения не превращались в запись
+ACCESS_RESOLUTION = 60
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS cache ('
+    ' key TEXT PRIMARY KEY,'
+    ' value BLOB NOT NULL,'
+    ' expires REAL,'
+    ' accessed REAL NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)',
+    'CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)',
+)
+
+
+class SQLiteCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = location
+        self._local = threading.local()
+        options = params.get('OPTIONS', {})
+        self._cull_every = int(options.get('CULL_EVERY', 100))
+        self._writes = itertools.count(1)
+
+    @property
+    def _db(self):
+        # Соединение своё у каждого потока и у каждого процесса после fork
+        pid = os.getpid()
+        if getattr(self._local, 'pid', None) != pid:
+            db = sqlite3.connect(self._path, timeout=30,
+                                 isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            for statement in SCHEMA:
+                db.execute(statement)
+            self._local.db, self._local.pid = db, pid
+        return self._local.db
+
+    @staticmethod
+    def _encode(value):
+        if type(value) is int:
+            return value
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def _decode(value):
+        if isinstance(value, int):
+            return value
+        return pickle.loads(value)
+
+    def _expires(self, timeout):
+        return self.get_backend_timeout(timeout)
+
+    def _row(self, key, now):
+        return self._db.execute(
+            'SELECT value, accessed FROM cache WHERE key = ?'
+            ' AND (expires IS NULL OR expires > ?)', (key, now)).fetchone()
+
+    def get(self, key, default=None, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        now = time.time()
+        row = self._row(key, now)
+        if row is None:
+            return default
+        value, accessed = row
+        if now - accessed > ACCESS_RESOLUTION:
+            self._db.execute('UPDATE cache SET accessed = ? WHERE key = ?',
+                             (now, key))
+        return self._decode(value)
+
+    def _write(self, mode, key, value, timeout, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        now = time.time()
+        db = self._db
+        with _transaction(db):
+            if mode == 'add' and self._row(key, now) is not None:
+                return False
+            db.execute('INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)',
+                       (key, self._encode(value), self._expires(timeout),
+                        now))
+            if next(self._writes) % self._cull_every == 0:
+                self._cull(db, now)
+        return True
+
+    def _cull(self, db, now):
+        db.execute('DELETE FROM cache WHERE expires <= ?', (now,))
+        count, = db.execute('SELECT COUNT(*) FROM cache').fetchone()
+        if count > self._max_entries:
+            surplus = count - self._max_entries
+            victims = max(surplus, count // self._cull_frequency)
+            db.execute('DELETE FROM cache WHERE key IN (SELECT key FROM cache'
+                       ' ORDER BY accessed LIMIT ?)', (victims,))
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._write('set', key, value, timeout, version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._write('add', key, value, timeout, version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        cursor = self._db.execute(
+            'UPDATE cache SET expires = ? WHERE key = ?'
+            ' AND (expires IS NULL OR expires > ?)',
+            (self._expires(timeout), key, time.time()))
+        return cursor.rowcount == 1
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        db = self._db
+        with _transaction(db):
+            row = self._row(key, time.time())
+            if row is None:
+                raise ValueError("Key '%s' not found" % key)
+            value = self._decode(row[0]) + delta
+            db.execute('UPDATE cache SET value = ? WHERE key = ?',
+                       (self._encode(value), key))
+        return value
+
+    def delete(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        self._db.execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    def has_key(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return self._row(key, time.time()) is not None
+
+    def clear(self):
+        self._db.execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # Соединение живёт между запросами: открывать его заново дорого
+        pass
+
+
+class _transaction:
+    """``BEGIN IMMEDIATE`` ... ``COMMIT``: блокировка на запись берётся
+    сразу, поэтому чтение-изменение-запись не перемежается с другими
+    процессами."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        self.db.execute('BEGIN IMMEDIATE')
+
+    def __exit__(self, exc_type, exc, tb):
+        self.db.execute('ROLLBACK' if exc_type else 'COMMIT')
@@ -0,0 +1,36 @@
+"""Прогрев кэша шаблонов при старте воркера.
+
+С ``django.template.loaders.cached.Loader`` шаблон разбирается один раз
+на процесс, но первый запрос каждого воркера всё равно платит за разбор
+``base.html``, ``post_item.html`` и остальных. ``warm_up`` заранее
+компилирует все шаблоны из ``TEMPLATES_DIR``.
+"""
+import logging
+import os
+
+from django.conf import settings
+from django.template import TemplateSyntaxError, engines
+
+logger = logging.getLogger(__name__)
+
+
+def template_names(directory):
+    for root, _, files in os.walk(directory):
+        for filename in sorted(files):
+            if filename.endswith(('.html', '.txt')):
+                path = os.path.join(root, filename)
+                yield os.path.relpath(path, directory).replace(os.sep, '/')
+
+
+def warm_up(directory=None):
+    """Компилирует шаблоны; возвращает число загруженных."""
+    engine = engines['django']
+    loaded = 0
+    for name in template_names(directory or settings.TEMPLATES_DIR):
+        try:
+            engine.get_template(name)
+        except TemplateSyntaxError:
+            logger.exception('Ошибка в шаблоне %s', name)
+        else:
+            loaded += 1
+    return loaded
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+# Шаблоны компилируются до первого запроса (см. TEMPLATE_CACHE)
+from yatube.template_warmup import warm_up  # noqa: E402
+
+warm_up()